@@ -1,10 +1,21 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Account, Card, Transaction
+from .models import User, Account, Card, Transaction, PendingCredit, AuditEntry, TerminalEntry
+from .routers import read_from_replica
+
+
+class ReplicaChangeListMixin:
+    """Serve admin changelists from read replicas"""
+
+    def changelist_view(self, request, extra_context=None):
+        # POSTs run admin actions and list_editable saves; they read what they write
+        if request.method == 'GET':
+            return read_from_replica(super().changelist_view)(request, extra_context)
+        return super().changelist_view(request, extra_context)
 
 
 @admin.register(User)
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(ReplicaChangeListMixin, UserAdmin):
     list_display = ['username', 'email', 'first_name', 'last_name', 'phone_number', 'is_staff']
     fieldsets = UserAdmin.fieldsets + (
         ('Additional Info', {'fields': ('phone_number', 'date_of_birth', 'address')}),
@@ -12,24 +23,63 @@ class CustomUserAdmin(UserAdmin):
 
 
 @admin.register(Account)
-class AccountAdmin(admin.ModelAdmin):
+class AccountAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = ['account_number', 'user', 'account_type', 'balance', 'status', 'created_at']
-    list_filter = ['account_type', 'status', 'created_at']
+    list_filter = ['account_type', 'status', 'queue_credits', 'created_at']
     search_fields = ['account_number', 'user__username', 'user__email']
     readonly_fields = ['account_number', 'created_at', 'updated_at']
 
 
 @admin.register(Card)
-class CardAdmin(admin.ModelAdmin):
-    list_display = ['card_number', 'account', 'card_type', 'status', 'expiry_date', 'created_at']
+class CardAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
+    list_display = ['card_number', 'account', 'card_type', 'status', 'failed_pin_attempts', 'expiry_date', 'created_at']
     list_filter = ['card_type', 'status', 'created_at']
     search_fields = ['card_number', 'account__account_number']
-    readonly_fields = ['card_number', 'cvv', 'created_at']
+    readonly_fields = ['card_number', 'cvv', 'failed_pin_attempts', 'created_at']
+
+    def save_model(self, request, obj, form, change):
+        # Unblocking a card starts its wrong-PIN count again
+        if 'status' in form.changed_data and obj.status == 'ACTIVE':
+            obj.failed_pin_attempts = 0
+        super().save_model(request, obj, form, change)
 
 
 @admin.register(Transaction)
-class TransactionAdmin(admin.ModelAdmin):
+class TransactionAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = ['transaction_id', 'account', 'transaction_type', 'amount', 'status', 'created_at']
     list_filter = ['transaction_type', 'status', 'created_at']
     search_fields = ['transaction_id', 'account__account_number']
     readonly_fields = ['transaction_id', 'created_at']
+
+
+@admin.register(PendingCredit)
+class PendingCreditAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
+    list_display = ['account', 'amount', 'source_account', 'applied', 'created_at']
+    list_filter = ['applied', 'created_at']
+    search_fields = ['account__account_number', 'source_account__account_number']
+    readonly_fields = ['account', 'amount', 'source_account', 'description', 'applied', 'created_at']
+
+
+@admin.register(AuditEntry)
+class AuditEntryAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
+    list_display = ['account', 'sequence', 'event', 'transaction', 'hash', 'created_at']
+    list_filter = ['event', 'created_at']
+    search_fields = ['account__account_number', 'transaction__transaction_id', 'hash']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(TerminalEntry)
+class TerminalEntryAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
+    list_display = ['terminal_id', 'entry_id', 'card_number', 'amount', 'status', 'reason', 'performed_at', 'received_at']
+    list_filter = ['status', 'terminal_id', 'received_at']
+    search_fields = ['terminal_id', 'entry_id', 'card_number', 'transaction__transaction_id']
+    readonly_fields = ['terminal_id', 'entry_id', 'card_number', 'amount', 'performed_at', 'status', 'reason',
+                       'transaction', 'received_at']
@@ -0,0 +1,123 @@
+"""
+Account and system analytics computed with SQL aggregation.
+
+Results are cached per account and period so repeated dashboard and API
+calls do not re-aggregate the ledger.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncHour, TruncMonth
+from django.utils import timezone
+
+from .models import Transaction
+
+
+ANALYTICS_CACHE_TIMEOUT = 300  # 5 minutes
+
+
+def _cached(key, compute):
+    result = cache.get(key)
+    if result is None:
+        result = compute()
+        cache.set(key, result, ANALYTICS_CACHE_TIMEOUT)
+    return result
+
+
+def _money(value):
+    return str(Decimal(value or 0).quantize(Decimal('0.01')))
+
+
+def _month_start(months_back):
+    """Midnight on the first day of the month `months_back` months before the current one"""
+    now = timezone.localtime()
+    year, month = divmod(now.year * 12 + now.month - 1 - months_back, 12)
+    return now.replace(year=year, month=month + 1, day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def monthly_totals(account, months=12):
+    """Monthly totals per transaction type for an account, current month included"""
+    since = _month_start(months - 1)
+
+    def compute():
+        rows = (
+            Transaction.objects
+            .filter(account=account, status='SUCCESS', created_at__gte=since)
+            .annotate(month=TruncMonth('created_at'))
+            .values('month')
+            .annotate(
+                deposits=Sum('amount', filter=Q(transaction_type='DEPOSIT')),
+                withdrawals=Sum('amount', filter=Q(transaction_type='WITHDRAWAL')),
+                transfers_out=Sum('amount', filter=Q(transaction_type='TRANSFER', recipient_account__isnull=False)),
+                transfers_in=Sum('amount', filter=Q(transaction_type='TRANSFER', recipient_account__isnull=True)),
+                count=Count('id'),
+            )
+            .order_by('month')
+        )
+        return [
+            {
+                'month': row['month'].strftime('%Y-%m'),
+                'deposits': _money(row['deposits']),
+                'withdrawals': _money(row['withdrawals']),
+                'transfers_out': _money(row['transfers_out']),
+                'transfers_in': _money(row['transfers_in']),
+                'count': row['count'],
+            }
+            for row in rows
+        ]
+
+    return _cached(f'analytics:monthly:{account.id}:{months}', compute)
+
+
+def top_recipients(account, limit=5, days=90):
+    """Accounts this account has sent the most money to"""
+    since = timezone.now() - timedelta(days=days)
+
+    def compute():
+        rows = (
+            Transaction.objects
+            .filter(account=account, transaction_type='TRANSFER', status='SUCCESS',
+                    recipient_account__isnull=False, created_at__gte=since)
+            .values('recipient_account__account_number')
+            .annotate(total=Sum('amount'), count=Count('id'))
+            .order_by('-total')[:limit]
+        )
+        return [
+            {
+                'account_number': row['recipient_account__account_number'],
+                'total': _money(row['total']),
+                'count': row['count'],
+            }
+            for row in rows
+        ]
+
+    return _cached(f'analytics:recipients:{account.id}:{days}:{limit}', compute)
+
+
+def hourly_volume(hours=24):
+    """System-wide transaction volume per hour and type"""
+    since = timezone.now() - timedelta(hours=hours)
+
+    def compute():
+        rows = (
+            Transaction.objects
+            .filter(status='SUCCESS', created_at__gte=since)
+            .exclude(transaction_type='BALANCE_INQUIRY')
+            .annotate(hour=TruncHour('created_at'))
+            .values('hour', 'transaction_type')
+            .annotate(total=Sum('amount'), count=Count('id'))
+            .order_by('hour', 'transaction_type')
+        )
+        return [
+            {
+                'hour': row['hour'].isoformat(),
+                'transaction_type': row['transaction_type'],
+                'total': _money(row['total']),
+                'count': row['count'],
+            }
+            for row in rows
+        ]
+
+    return _cached(f'analytics:hourly:{hours}', compute)
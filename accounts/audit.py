@@ -0,0 +1,260 @@
+"""
+Hash-chained audit log of ledger writes.
+
+Every Transaction insert or update appends an AuditEntry in the same atomic
+block. Each entry hashes the account, its position in the account's chain,
+the previous entry's hash and a canonical snapshot of the transaction, so
+editing or removing an entry breaks the chain and editing a transaction row
+directly no longer matches its latest snapshot.
+
+Single saves are recorded by a post_save signal. Bulk paths (bulk_create
+sends no signals) call record_transactions() themselves.
+
+verify_audit() checks entries in parallel id-range partitions tracked by
+BatchCheckpoint. Each run starts where the previous one ended, so a daily
+run only covers new entries; pass full=True to re-verify everything. The
+same run flags new ledger rows written without an audit entry, and compares
+every chain with the head (AuditChainHead) recorded by earlier runs, which
+catches the newest entries being deleted along with their transactions.
+"""
+import hashlib
+import json
+import time
+from collections import defaultdict
+
+from django.db import connection, transaction as db_transaction
+from django.db.models import Exists, F, Max, Min, OuterRef, Q, Subquery
+
+from .models import Account, AuditChainHead, AuditEntry, BatchCheckpoint, Transaction
+from .money import Money
+
+
+JOB_NAME = 'audit_verify'
+LEDGER_JOB_NAME = 'audit_verify_ledger'
+MAX_REPORTED_PROBLEMS = 100
+
+
+def snapshot(transaction):
+    """Canonical JSON snapshot of a transaction row"""
+    return json.dumps({
+        'transaction_id': transaction.transaction_id,
+        'account_id': transaction.account_id,
+        'transaction_type': transaction.transaction_type,
+        'amount': Money.from_decimal(transaction.amount).paise,
+        'balance_before': Money.from_decimal(transaction.balance_before).paise,
+        'balance_after': Money.from_decimal(transaction.balance_after).paise,
+        'recipient_account_id': transaction.recipient_account_id,
+        'status': transaction.status,
+        'description': transaction.description,
+        'created_at': transaction.created_at.isoformat(),
+    }, sort_keys=True, separators=(',', ':'))
+
+
+def entry_hash(account_id, sequence, event, prev_hash, payload):
+    material = f'{account_id}|{sequence}|{event}|{prev_hash}|{payload}'
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def record_transactions(transactions, event='CREATE'):
+    """Append audit entries for saved ledger rows, in order, inside the caller's transaction"""
+    if not transactions:
+        return []
+    by_account = defaultdict(list)
+    for transaction in transactions:
+        by_account[transaction.account_id].append(transaction)
+
+    account_ids = list(by_account)
+    with db_transaction.atomic(savepoint=False):
+        # Locking the accounts serialises appends to each chain. SQLite has no
+        # row locks; the ledger insert already holds its database write lock.
+        if connection.features.has_select_for_update:
+            list(Account.objects.select_for_update().filter(id__in=account_ids).values_list('id', flat=True))
+        if len(account_ids) == 1:
+            # Single saves: a plain index lookup is much cheaper to build than the annotated query
+            heads = AuditEntry.objects.filter(account_id=account_ids[0]).order_by('-sequence')[:1]
+        else:
+            latest = AuditEntry.objects.filter(account=OuterRef('pk')).order_by('-sequence')
+            heads = Account.objects.filter(id__in=account_ids).annotate(
+                account_id=F('id'),
+                sequence=Subquery(latest.values('sequence')[:1]),
+                hash=Subquery(latest.values('hash')[:1]),
+            )
+        heads = {
+            account_id: (sequence or 0, head_hash or AuditEntry.GENESIS_HASH)
+            for account_id, sequence, head_hash in heads.values_list('account_id', 'sequence', 'hash')
+        }
+
+        entries = []
+        for account_id, account_transactions in by_account.items():
+            sequence, prev_hash = heads.get(account_id, (0, AuditEntry.GENESIS_HASH))
+            for transaction in account_transactions:
+                sequence += 1
+                payload = snapshot(transaction)
+                digest = entry_hash(account_id, sequence, event, prev_hash, payload)
+                entries.append(AuditEntry(
+                    account_id=account_id, transaction_id=transaction.pk, sequence=sequence,
+                    event=event, payload=payload, prev_hash=prev_hash, hash=digest,
+                ))
+                prev_hash = digest
+        return AuditEntry.objects.bulk_create(entries, batch_size=5000)
+
+
+def verify_entries(entries):
+    """Problems found in a batch of annotated entries, as (entry id, account id, reason) tuples"""
+    problems = []
+    for entry in entries:
+        if entry.sequence == 1:
+            expected_prev = AuditEntry.GENESIS_HASH
+        else:
+            expected_prev = entry.previous_hash
+            if expected_prev is None:
+                problems.append((entry.id, entry.account_id, f'entry #{entry.sequence - 1} is missing'))
+                continue
+        if entry.prev_hash != expected_prev:
+            problems.append((entry.id, entry.account_id, 'chain broken: previous hash does not match'))
+        elif entry.hash != entry_hash(entry.account_id, entry.sequence, entry.event, entry.prev_hash, entry.payload):
+            problems.append((entry.id, entry.account_id, 'entry hash does not match its contents'))
+        elif entry.transaction.account_id != entry.account_id:
+            problems.append((entry.id, entry.account_id, 'transaction moved to another account'))
+        elif not entry.superseded and snapshot(entry.transaction) != entry.payload:
+            problems.append((entry.id, entry.account_id,
+                             f'transaction {entry.transaction.transaction_id} changed outside the audit log'))
+    return problems
+
+
+def _entries_to_verify():
+    previous = AuditEntry.objects.filter(account=OuterRef('account'), sequence=OuterRef('sequence') - 1)
+    later = AuditEntry.objects.filter(transaction=OuterRef('transaction'), id__gt=OuterRef('id'))
+    return (
+        AuditEntry.objects.select_related('transaction')
+        .annotate(previous_hash=Subquery(previous.values('hash')[:1]), superseded=Exists(later))
+        .order_by('id')
+    )
+
+
+def _verify_checkpoint(checkpoint_id, chunk_size, rows, verify):
+    """Run verify() over a partition's rows chunk by chunk, saving progress after each chunk"""
+    checkpoint = BatchCheckpoint.objects.get(id=checkpoint_id)
+    position = checkpoint.last_processed_id or checkpoint.range_start - 1
+    checked = problem_count = 0
+    problems = []
+
+    while not checkpoint.completed:
+        chunk = list(rows.filter(id__gt=position, id__lte=checkpoint.range_end).order_by('id')[:chunk_size])
+        found = verify(chunk)
+        checked += len(chunk)
+        problem_count += len(found)
+        problems.extend(found[:MAX_REPORTED_PROBLEMS - len(problems)])
+        if chunk:
+            position = checkpoint.last_processed_id = chunk[-1].id
+        checkpoint.completed = len(chunk) < chunk_size
+        checkpoint.save(update_fields=['last_processed_id', 'completed', 'updated_at'])
+
+    return checked, problem_count, problems
+
+
+def verify_partition(checkpoint_id, chunk_size):
+    """Verify one partition of audit entries; returns (entries checked, problem count, first problems)"""
+    return _verify_checkpoint(checkpoint_id, chunk_size, _entries_to_verify(), verify_entries)
+
+
+def _unaudited(transactions):
+    return [
+        (None, transaction.account_id, f'transaction {transaction.transaction_id} has no audit entry')
+        for transaction in transactions if not transaction.audited
+    ]
+
+
+def verify_ledger_partition(checkpoint_id, chunk_size):
+    """Flag ledger rows in one partition that were written without an audit entry
+
+    Catches rows inserted with raw SQL or bulk_create() without record_transactions().
+    """
+    rows = Transaction.objects.annotate(
+        audited=Exists(AuditEntry.objects.filter(transaction=OuterRef('pk')))
+    ).only('id', 'account_id', 'transaction_id')
+    return _verify_checkpoint(checkpoint_id, chunk_size, rows, _unaudited)
+
+
+def check_chain_heads():
+    """Problems for chains whose last verified entry is gone or was replaced (newest entries deleted)"""
+    current = AuditEntry.objects.filter(account=OuterRef('account'), sequence=OuterRef('sequence'))
+    cut = (
+        AuditChainHead.objects.annotate(current_hash=Subquery(current.values('hash')[:1]))
+        .filter(Q(current_hash__isnull=True) | ~Q(current_hash=F('hash')))
+        .order_by('account_id')
+        .values_list('account_id', 'sequence')
+    )
+    return [(None, account_id, f'chain cut short or rewritten at entry #{sequence}') for account_id, sequence in cut]
+
+
+def record_chain_heads(low, high, batch_size=5000):
+    """Remember the newest entry up to id `high` of every chain with entries in [low, high]"""
+    account_ids = list(
+        AuditEntry.objects.filter(id__gte=low, id__lte=high)
+        .order_by('account_id').values_list('account_id', flat=True).distinct()
+    )
+    latest = AuditEntry.objects.filter(account=OuterRef('pk'), id__lte=high).order_by('-sequence')
+    for start in range(0, len(account_ids), batch_size):
+        heads = Account.objects.filter(id__in=account_ids[start:start + batch_size]).annotate(
+            head_sequence=Subquery(latest.values('sequence')[:1]),
+            head_hash=Subquery(latest.values('hash')[:1]),
+        ).values_list('id', 'head_sequence', 'head_hash')
+        AuditChainHead.objects.bulk_create(
+            [AuditChainHead(account_id=account_id, sequence=sequence, hash=head_hash)
+             for account_id, sequence, head_hash in heads],
+            update_conflicts=True, unique_fields=['account'], update_fields=['sequence', 'hash', 'updated_at'],
+        )
+
+
+def _plan_run(job, queryset, workers, full, floor=0):
+    """Checkpoint ids for an interrupted run of `job`, or for a new run over rows past the last one"""
+    from .batch import plan_partitions
+
+    pending = BatchCheckpoint.objects.filter(job=job, completed=False).values_list('run_key', flat=True).first()
+    if pending and not full:
+        return list(BatchCheckpoint.objects.filter(job=job, run_key=pending).values_list('id', flat=True))
+    verified_up_to = floor if full else max(
+        floor, BatchCheckpoint.objects.filter(job=job).aggregate(end=Max('range_end'))['end'] or 0
+    )
+    queryset = queryset.filter(id__gt=verified_up_to)
+    high = queryset.aggregate(high=Max('id'))['high']
+    if high is None:
+        return []
+    run_key = f'{verified_up_to + 1}-{high}' + (f'@{time.time_ns()}' if full else '')
+    return plan_partitions(job, run_key, queryset.filter(id__lte=high), max(workers, 1))
+
+
+def verify_audit(workers=1, chunk_size=10000, full=False):
+    """Verify the audit log written since the last run (or all of it with full=True)
+
+    Checks new entries' hashes and links, flags new ledger rows that have no
+    audit entry, and checks every chain still reaches the head recorded by
+    earlier runs, so deleting the newest entries is noticed. Ledger rows from
+    before the audit log existed are not checked. An interrupted run is
+    resumed before a new one is started. Problems are reported by the run
+    that finds them only; re-check with full=True.
+    Returns (entries and ledger rows checked, problem count, first problems).
+    """
+    # Imported here: this module is loaded at startup by the audit signal receivers
+    from .batch import run_partitions
+
+    entry_checkpoints = _plan_run(JOB_NAME, AuditEntry.objects.all(), workers, full)
+    results = run_partitions(verify_partition, entry_checkpoints, workers, chunk_size=chunk_size)
+
+    first_audited = AuditEntry.objects.aggregate(first=Min('transaction_id'))['first']
+    if first_audited is not None:
+        ledger_checkpoints = _plan_run(LEDGER_JOB_NAME, Transaction.objects.all(), workers, full, first_audited - 1)
+        results += run_partitions(verify_ledger_partition, ledger_checkpoints, workers, chunk_size=chunk_size)
+
+    heads = check_chain_heads()
+    results.append((0, len(heads), heads))
+    if entry_checkpoints:
+        bounds = BatchCheckpoint.objects.filter(id__in=entry_checkpoints).aggregate(
+            low=Min('range_start'), high=Max('range_end')
+        )
+        record_chain_heads(bounds['low'], bounds['high'])
+
+    problems = [problem for _checked, _count, found in results for problem in found]
+    return (sum(result[0] for result in results), sum(result[1] for result in results),
+            problems[:MAX_REPORTED_PROBLEMS])
@@ -0,0 +1,53 @@
+"""
+Helpers for restartable, partitioned batch jobs.
+
+A run is split into id-range partitions, each tracked by a BatchCheckpoint
+row. Workers commit their checkpoint in the same atomic block as each chunk
+of work, so an interrupted run resumes where it stopped.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.db import connections
+from django.db.models import Max, Min
+
+from .models import BatchCheckpoint
+
+
+def plan_partitions(job, run_key, queryset, parts):
+    """Return checkpoint ids for a run, creating the partitions on first start"""
+    existing = list(
+        BatchCheckpoint.objects.filter(job=job, run_key=run_key).values_list('id', flat=True)
+    )
+    if existing:
+        return existing
+
+    bounds = queryset.aggregate(low=Min('id'), high=Max('id'))
+    if bounds['low'] is None:
+        return []
+    low, high = bounds['low'], bounds['high']
+    width = max((high - low + 1 + parts - 1) // parts, 1)
+    BatchCheckpoint.objects.bulk_create([
+        BatchCheckpoint(job=job, run_key=run_key, range_start=start, range_end=min(start + width - 1, high))
+        for start in range(low, high + 1, width)
+    ])
+    return list(
+        BatchCheckpoint.objects.filter(job=job, run_key=run_key).values_list('id', flat=True)
+    )
+
+
+def _init_worker():
+    django.setup()
+    connections.close_all()
+
+
+def run_partitions(process, checkpoint_ids, workers=1, **kwargs):
+    """Run process(checkpoint_id, **kwargs) for each partition, across processes if workers > 1"""
+    if workers <= 1 or len(checkpoint_ids) <= 1:
+        return [process(checkpoint_id, **kwargs) for checkpoint_id in checkpoint_ids]
+
+    # Child processes must not share the parent's database connections
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(process, checkpoint_id, **kwargs) for checkpoint_id in checkpoint_ids]
+        return [future.result() for future in futures]
@@ -0,0 +1,802 @@
+"""
+Performance benchmarks for the ATM system.
+
+Each benchmark is registered with @benchmark and run through
+``python manage.py benchmark <name>``. It receives the requested dataset
+size and returns a list of (label, value) rows to report.
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a benchmark function under the given name"""
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+def _rate(count, seconds):
+    return f'{count / seconds:,.0f}/s' if seconds else 'n/a'
+
+
+def _run_sqlite_writers(path, threads, writes_per_thread, tuned):
+    """Run concurrent ledger-style writers against a SQLite file"""
+    errors = []
+    timeout = 20 if tuned else 5
+
+    def connect():
+        conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        if tuned:
+            for pragma in settings.SQLITE_PRAGMAS:
+                conn.execute(pragma)
+        return conn
+
+    def writer(worker):
+        conn = connect() if tuned else None
+        for i in range(writes_per_thread):
+            # The default profile opens a new connection per request (CONN_MAX_AGE=0)
+            current = conn or connect()
+            try:
+                current.execute('BEGIN IMMEDIATE' if tuned else 'BEGIN')
+                current.execute('SELECT balance FROM ledger WHERE id = ?', (worker,))
+                current.execute('UPDATE ledger SET balance = balance + 1 WHERE id = ?', (worker,))
+                current.execute('INSERT INTO entries (account_id, amount) VALUES (?, 1)', (worker,))
+                current.execute('COMMIT')
+            except sqlite3.OperationalError as exc:
+                errors.append(exc)
+                if current.in_transaction:
+                    current.execute('ROLLBACK')
+            finally:
+                if conn is None:
+                    current.close()
+        if conn is not None:
+            conn.close()
+
+    setup = sqlite3.connect(path)
+    setup.execute('CREATE TABLE ledger (id INTEGER PRIMARY KEY, balance INTEGER NOT NULL)')
+    setup.execute('CREATE TABLE entries (id INTEGER PRIMARY KEY, account_id INTEGER, amount INTEGER)')
+    setup.executemany('INSERT INTO ledger (id, balance) VALUES (?, 0)', [(i,) for i in range(threads)])
+    setup.commit()
+    setup.close()
+
+    workers = [threading.Thread(target=writer, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    return threads * writes_per_thread - len(errors), len(errors), elapsed
+
+
+@benchmark('sqlite_writers')
+def sqlite_writers(size):
+    """Concurrent deposit-style writers: default SQLite settings vs the SQLITE_TUNED profile"""
+    threads = 8
+    writes_per_thread = max(size // threads, 1)
+    rows = []
+    for label, tuned in (('default', False), ('tuned', True)):
+        with tempfile.TemporaryDirectory() as directory:
+            committed, failed, elapsed = _run_sqlite_writers(
+                os.path.join(directory, 'bench.sqlite3'), threads, writes_per_thread, tuned)
+        rows.append((f'{label} committed', f'{committed} ({_rate(committed, elapsed)})'))
+        rows.append((f'{label} locked errors', failed))
+    return rows
+
+
+def _seed_accounts(count, prefix='bench'):
+    """Create `count` accounts owned by one benchmark user"""
+    from .models import Account, User
+
+    user = User.objects.create_user(username=f'{prefix}-user', password='benchmark')
+    Account.objects.bulk_create(
+        [Account(user=user, account_number=f'9{i:015d}', account_type=('SAVINGS', 'CHECKING', 'CURRENT')[i % 3],
+                 balance=Decimal('10000.00'), pin='1234')
+         for i in range(count)],
+        batch_size=5000,
+    )
+    return list(Account.objects.filter(user=user).order_by('id'))
+
+
+def _seed_transactions(accounts, count, batch_size=10000):
+    """Bulk insert `count` ledger rows spread over the given accounts"""
+    from .models import Transaction
+
+    types = ('DEPOSIT', 'WITHDRAWAL', 'TRANSFER')
+    batch = []
+    for i in range(count):
+        account = accounts[i % len(accounts)]
+        transaction_type = types[i % 3]
+        amount = Decimal(i % 5000 + 1) / 100
+        batch.append(Transaction(
+            account=account, transaction_type=transaction_type, amount=amount,
+            balance_before=Decimal('10000.00'), balance_after=Decimal('10000.00'),
+            recipient_account=accounts[(i + 1) % len(accounts)] if transaction_type == 'TRANSFER' else None,
+            transaction_id=f'TXB{i:017d}',
+        ))
+        if len(batch) == batch_size:
+            Transaction.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Transaction.objects.bulk_create(batch)
+
+
+@benchmark('analytics')
+def analytics_aggregation(size):
+    """Monthly totals: rows pulled into Python vs SQL aggregation vs cached"""
+    from collections import defaultdict
+
+    from django.core.cache import cache
+
+    from . import analytics
+    from .models import Transaction
+
+    accounts = _seed_accounts(max(size // 1000, 1))
+    _seed_transactions(accounts, size)
+    account = accounts[0]
+
+    start = time.perf_counter()
+    totals = defaultdict(Decimal)
+    for row in Transaction.objects.filter(account=account).values('created_at', 'transaction_type', 'amount'):
+        totals[(row['created_at'].strftime('%Y-%m'), row['transaction_type'])] += row['amount']
+    python_monthly = time.perf_counter() - start
+
+    start = time.perf_counter()
+    totals = defaultdict(Decimal)
+    for row in Transaction.objects.values('created_at', 'transaction_type', 'amount'):
+        totals[(row['created_at'].replace(minute=0, second=0, microsecond=0), row['transaction_type'])] += row['amount']
+    python_hourly = time.perf_counter() - start
+
+    cache.clear()
+    start = time.perf_counter()
+    analytics.monthly_totals(account)
+    sql_monthly = time.perf_counter() - start
+
+    start = time.perf_counter()
+    analytics.monthly_totals(account)
+    cached_monthly = time.perf_counter() - start
+
+    start = time.perf_counter()
+    analytics.hourly_volume()
+    sql_hourly = time.perf_counter() - start
+
+    return [
+        ('monthly totals, python', f'{python_monthly * 1000:.1f} ms'),
+        ('monthly totals, sql', f'{sql_monthly * 1000:.1f} ms'),
+        ('monthly totals, cached', f'{cached_monthly * 1000:.3f} ms'),
+        ('hourly volume, python', f'{python_hourly * 1000:.1f} ms'),
+        ('hourly volume, sql', f'{sql_hourly * 1000:.1f} ms'),
+    ]
+
+
+@benchmark('eod')
+def eod_batch(size):
+    """End-of-day interest/fees: per-account save() loop vs vectorized chunked batch"""
+    from datetime import date
+
+    from django.db import transaction as db_transaction
+
+    from .eod import run_eod
+    from .models import Transaction
+
+    accounts = _seed_accounts(size)
+    naive_sample = accounts[:min(size, 2000)]
+
+    start = time.perf_counter()
+    for account in naive_sample:
+        rule = settings.EOD_ACCOUNT_RULES[account.account_type]
+        interest = (account.balance * Decimal(rule['annual_interest_rate']) / 365).quantize(Decimal('0.01'))
+        if interest:
+            with db_transaction.atomic():
+                before = account.balance
+                account.balance += interest
+                account.save()
+                Transaction.objects.create(
+                    account=account, transaction_type='INTEREST', amount=interest,
+                    balance_before=before, balance_after=account.balance,
+                )
+    naive_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    processed, _interest, _fees = run_eod(date(2000, 1, 1), chunk_size=5000)
+    batch_seconds = time.perf_counter() - start
+
+    return [
+        ('per-account loop', f'{len(naive_sample)} accounts ({_rate(len(naive_sample), naive_seconds)})'),
+        ('vectorized batch', f'{processed} accounts ({_rate(processed, batch_seconds)})'),
+    ]
+
+
+@benchmark('card_lifecycle')
+def card_lifecycle(size):
+    """Card renewal and expiry throughput over `size` cards, a third of them due"""
+    from datetime import date, timedelta
+
+    from .cards import expire_cards, generate_card_numbers, renew_cards
+    from .models import Card
+
+    accounts = _seed_accounts(max(size // 10, 1))
+    today = date(2030, 1, 1)
+    numbers = generate_card_numbers(size)
+    Card.objects.bulk_create(
+        [Card(account=accounts[i % len(accounts)], card_number=numbers[i], cvv='123',
+              expiry_date=today + timedelta(days=(i % 3 - 1) * 20 + (i % 7)))
+         for i in range(size)],
+        batch_size=10000,
+    )
+
+    start = time.perf_counter()
+    renewed = renew_cards(today, renewal_days=7, batch_size=5000)
+    renew_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expired = expire_cards(today, batch_size=5000)
+    expire_seconds = time.perf_counter() - start
+
+    return [
+        ('renewed', f'{renewed} ({_rate(renewed, renew_seconds)})'),
+        ('expired', f'{expired} ({_rate(expired, expire_seconds)})'),
+    ]
+
+
+def _run_concurrently(func, threads, calls_per_thread):
+    """Call func(worker, i) from several threads; returns (elapsed seconds, sorted latencies)"""
+    from django.db import connections
+
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(index):
+        local = []
+        for i in range(calls_per_thread):
+            start = time.perf_counter()
+            func(index, i)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+        connections.close_all()
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def _latency_summary(label, elapsed, latencies):
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    return (label, f'p50 {p50:.3f} ms, p99 {p99:.3f} ms, {_rate(len(latencies), elapsed)}')
+
+
+@benchmark('card_auth')
+def card_auth(size):
+    """Card + PIN authentication latency from 8 concurrent terminals, cold vs cached card resolution"""
+    from datetime import date
+
+    from django.core.cache import caches
+
+    from .cards import authenticate_card, generate_card_numbers
+    from .models import Card
+
+    accounts = _seed_accounts(max(size // 10, 1))
+    numbers = generate_card_numbers(size)
+    Card.objects.bulk_create(
+        [Card(account=accounts[i % len(accounts)], card_number=number, cvv='123', expiry_date=date(2099, 1, 1))
+         for i, number in enumerate(numbers)],
+        batch_size=10000,
+    )
+    threads, calls = 8, 500
+    hot_cards = numbers[:200]
+
+    def cold(worker, i):
+        # Every terminal uses a different card, so each lookup misses the cache
+        authenticate_card(numbers[(worker * calls + i) % len(numbers)], '1234')
+
+    def cached(worker, i):
+        authenticate_card(hot_cards[i % len(hot_cards)], '1234')
+
+    caches['cards'].clear()
+    cold_result = _run_concurrently(cold, threads, calls)
+    for number in hot_cards:
+        authenticate_card(number, '1234')
+    cached_result = _run_concurrently(cached, threads, calls)
+    return [
+        _latency_summary('uncached card lookup', *cold_result),
+        _latency_summary('cached card lookup', *cached_result),
+    ]
+
+
+@benchmark('templates')
+def template_rendering(size):
+    """Per-template render time: default loaders and cold fragments vs cached loader and warm fragments"""
+    from django.core.cache import cache
+    from django.template.backends.django import DjangoTemplates
+    from django.test import RequestFactory
+    from django.urls import resolve
+
+    from .models import Transaction
+
+    account = _seed_accounts(1)[0]
+    _seed_transactions([account], 50)
+    transaction = Transaction.objects.filter(account=account).first()
+    user = account.user
+    user.first_name, user.last_name = 'Bench', 'User'
+
+    def make_engine(cached):
+        config = settings.TEMPLATES[0]
+        options = {key: value for key, value in config['OPTIONS'].items() if key != 'loaders'}
+        loaders = ['django.template.loaders.filesystem.Loader', 'django.template.loaders.app_directories.Loader']
+        options['loaders'] = [('django.template.loaders.cached.Loader', loaders)] if cached else loaders
+        return DjangoTemplates({'NAME': f'bench-{cached}', 'DIRS': config['DIRS'], 'APP_DIRS': False, 'OPTIONS': options})
+
+    pages = {
+        'accounts/dashboard.html': ('/dashboard/', {
+            'accounts': [account], 'active_account': account,
+            'recent_transactions': list(Transaction.objects.filter(account=account)[:10]),
+        }),
+        'accounts/transaction_history.html': ('/transaction-history/', {
+            'account': account, 'transactions': list(Transaction.objects.filter(account=account)),
+        }),
+        'accounts/transaction_receipt.html': (f'/transaction/{transaction.id}/', {'transaction': transaction}),
+        'accounts/profile.html': ('/profile/', {'accounts': [account]}),
+    }
+    iterations = max(size // 100, 10)
+    rows = []
+    for template_name, (path, context) in pages.items():
+        request = RequestFactory().get(path)
+        request.user = user
+        request.resolver_match = resolve(path)
+        timings = []
+        for cached in (False, True):
+            engine = make_engine(cached)
+            cache.clear()
+            start = time.perf_counter()
+            for _ in range(iterations):
+                if not cached:
+                    cache.clear()
+                engine.get_template(template_name).render(context, request)
+            timings.append((time.perf_counter() - start) / iterations * 1000)
+        rows.append((template_name, f'default {timings[0]:.2f} ms, cached {timings[1]:.2f} ms'))
+    return rows
+
+
+@benchmark('money')
+def money_representation(size):
+    """Ledger posting and aggregation: Decimal amounts vs integer paise (Money)"""
+    from django.db import connection
+    from django.db.models import Sum
+
+    from .money import Money
+    from .models import Transaction
+
+    amounts = [Decimal(i % 500000 + 1) / 100 for i in range(size)]
+    money_amounts = [Money.from_decimal(amount) for amount in amounts]
+
+    start = time.perf_counter()
+    balance = Decimal('0.00')
+    for amount in amounts:
+        before = balance
+        balance = before + amount
+    decimal_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    balance = Money()
+    for amount in money_amounts:
+        before = balance
+        balance = before + amount
+    money_seconds = time.perf_counter() - start
+
+    paise_amounts = [amount.paise for amount in money_amounts]
+    start = time.perf_counter()
+    balance = 0
+    for amount in paise_amounts:
+        before = balance
+        balance = before + amount
+    paise_seconds = time.perf_counter() - start
+
+    account = _seed_accounts(1)[0]
+    _seed_transactions([account], size)
+    with connection.cursor() as cursor:
+        cursor.execute('CREATE TEMPORARY TABLE bench_paise (account_id INTEGER, amount BIGINT)')
+        cursor.executemany(
+            'INSERT INTO bench_paise (account_id, amount) VALUES (%s, %s)',
+            [(account.id, int(amount * 100)) for amount in Transaction.objects.values_list('amount', flat=True)],
+        )
+
+    start = time.perf_counter()
+    Transaction.objects.filter(account=account).aggregate(total=Sum('amount'))
+    decimal_sum_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT SUM(amount) FROM bench_paise WHERE account_id = %s', [account.id])
+        Money(cursor.fetchone()[0])
+    paise_sum_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sum(Transaction.objects.filter(account=account).values_list('amount', flat=True))
+    decimal_fetch_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT amount FROM bench_paise WHERE account_id = %s', [account.id])
+        Money(sum(row[0] for row in cursor.fetchall()))
+    paise_fetch_seconds = time.perf_counter() - start
+
+    return [
+        ('posting, Decimal', _rate(size, decimal_seconds)),
+        ('posting, Money', _rate(size, money_seconds)),
+        ('posting, raw int paise', _rate(size, paise_seconds)),
+        ('SUM in database, decimal column', f'{decimal_sum_seconds * 1000:.1f} ms'),
+        ('SUM in database, paise column', f'{paise_sum_seconds * 1000:.1f} ms'),
+        ('fetch + sum in Python, Decimal', f'{decimal_fetch_seconds * 1000:.1f} ms'),
+        ('fetch + sum in Python, paise', f'{paise_fetch_seconds * 1000:.1f} ms'),
+    ]
+
+
+@benchmark('hot_recipient')
+def hot_recipient(size):
+    """Transfers into one merchant account: direct credit vs queued credit + batch apply"""
+    from .models import Account
+    from .transfers import apply_pending_credits, post_transfer
+
+    *senders, direct, queued = _seed_accounts(102)
+    queued.queue_credits = True
+    queued.save()
+    amount = Decimal('1.00')
+
+    rows = []
+    for label, recipient in (('direct credit', direct), ('queued credit', queued)):
+        recipient = Account.objects.get(id=recipient.id)
+        start = time.perf_counter()
+        for i in range(size):
+            post_transfer(senders[i % len(senders)], recipient, amount, 'bench')
+        elapsed = time.perf_counter() - start
+        rows.append((label, f'{size} transfers ({_rate(size, elapsed)})'))
+
+    start = time.perf_counter()
+    applied = apply_pending_credits()
+    elapsed = time.perf_counter() - start
+    rows.append(('batch apply of queued credits', f'{applied} credits ({_rate(applied, elapsed)})'))
+    return rows
+
+
+@benchmark('live_balance')
+def live_balance(size):
+    """Server cost of refreshing the balance: full dashboard reload vs 304/200 balance polls"""
+    from django.db import connection, reset_queries
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    account = _seed_accounts(3)[0]
+    _seed_transactions([account], size)
+    client = Client()
+    client.force_login(account.user)
+    session = client.session
+    session['active_account_id'] = account.id
+    session.save()
+    etag = client.get('/api/balance/')['ETag']
+
+    requests = {
+        'dashboard reload': lambda: client.get('/dashboard/'),
+        'balance poll, unchanged (304)': lambda: client.get('/api/balance/', HTTP_IF_NONE_MATCH=etag),
+        'balance poll, changed (200)': lambda: client.get('/api/balance/'),
+    }
+    iterations = 200
+    rows = []
+    for label, request in requests.items():
+        reset_queries()  # the query log is a bounded deque; seeding fills it
+        with CaptureQueriesContext(connection) as queries:
+            request()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            request()
+        elapsed = (time.perf_counter() - start) / iterations * 1000
+        rows.append((label, f'{elapsed:.2f} ms, {len(queries)} queries'))
+    return rows
+
+
+@benchmark('reconciliation')
+def reconciliation(size):
+    """Settlement file vs ledger merge-join: external sort, presorted file, ledger stream alone"""
+    from accounts.reconciliation import OUTCOMES, ledger_rows, reconcile
+    from django.utils import timezone
+
+    accounts = _seed_accounts(100)
+    _seed_transactions(accounts, size, batch_size=50000)
+    today = timezone.localdate()
+
+    def write_settlement(path, presorted):
+        # Scatter the lines with a fixed stride instead of holding a shuffle in memory
+        stride = 1 if presorted else 7919
+        while not presorted and size % stride == 0:
+            stride += 2
+        lines = 0
+        with open(path, 'w') as settlement:
+            settlement.write('transaction_id,transaction_type,amount\n')
+            for position in range(size):
+                i = position * stride % size
+                transaction_type = ('DEPOSIT', 'WITHDRAWAL', 'TRANSFER')[i % 3]
+                paise = i % 5000 + 1
+                if transaction_type == 'TRANSFER' or i % 100 == 1:
+                    continue  # transfers are not settled; 1% missing from the file
+                if i % 100 == 2:
+                    paise += 1  # 1% amount mismatches
+                settlement.write(f'TXB{i:017d},{transaction_type},{paise // 100}.{paise % 100:02d}\n')
+                lines += 1
+                if i % 100 == 3:
+                    # 1% settled items the ledger never saw; the suffix keeps the file sorted
+                    settlement.write(f'TXB{i:017d}X,{transaction_type},1.00\n')
+                    lines += 1
+        return lines
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        ledger_count = sum(1 for _ in ledger_rows(today))
+        rows.append(('ledger stream only', f'{ledger_count} rows ({_rate(ledger_count, time.perf_counter() - start)})'))
+
+        for label, presorted in (('unsorted file (external sort)', False), ('presorted file', True)):
+            path = os.path.join(directory, f'settlement-{presorted}.csv')
+            lines = write_settlement(path, presorted)
+            start = time.perf_counter()
+            counts = reconcile(path, today, os.path.join(directory, 'reports'), presorted=presorted,
+                               run_size=max(size // 8, 1000))
+            elapsed = time.perf_counter() - start
+            rows.append((label, f'{lines} lines in {elapsed:.1f}s ({_rate(lines, elapsed)})'))
+        rows.append(('outcomes', ', '.join(f'{outcome} {counts[outcome]}' for outcome in OUTCOMES)))
+    return rows
+
+
+@benchmark('account_overview')
+def account_overview(size):
+    """Multi-account overview page: queries and render time as the account count grows"""
+    from django.db import connection, reset_queries
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    from .models import Account, Card, User
+
+    accounts = _seed_accounts(max(size // 100, 50))
+    Card.objects.bulk_create([
+        Card(account=account, card_number=f'4{i:015d}', cvv='123', expiry_date='2030-01-01',
+             status=('ACTIVE', 'BLOCKED')[i % 2])
+        for i, account in enumerate(accounts * 2)
+    ])
+    _seed_transactions(accounts, size)
+    owner = accounts[0].user
+    other = User.objects.create_user(username='overview-other', password='benchmark')
+    client = Client()
+    client.force_login(owner)
+
+    rows = []
+    for count in (1, 10, len(accounts)):
+        # The first `count` accounts belong to the viewer, the rest to another user
+        Account.objects.filter(id__in=[account.id for account in accounts[count:]]).update(user=other)
+        Account.objects.filter(id__in=[account.id for account in accounts[:count]]).update(user=owner)
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            client.get('/accounts/')
+        start = time.perf_counter()
+        for _ in range(20):
+            client.get('/accounts/')
+        elapsed = (time.perf_counter() - start) / 20 * 1000
+        sql_ms = sum(float(query['time']) for query in queries.captured_queries) * 1000
+        rows.append((f'{count} accounts', f'{len(queries)} queries ({sql_ms:.2f} ms SQL), {elapsed:.2f} ms'))
+    return rows
+
+
+@benchmark('audit')
+def audit_log(size):
+    """Audit chain cost: per-save overhead, bulk append, full and incremental verification"""
+    from django.db import transaction as db_transaction
+    from django.db.models.signals import post_save
+
+    from .audit import record_transactions, verify_audit
+    from .models import Transaction
+    from .signals import audit_transaction
+
+    accounts = _seed_accounts(100)
+    rows = []
+
+    samples = min(size, 2000)
+    timings = []
+    for connected in (False, True):
+        if not connected:
+            post_save.disconnect(audit_transaction, sender=Transaction)
+        start = time.perf_counter()
+        for i in range(samples):
+            with db_transaction.atomic():
+                Transaction.objects.create(
+                    account=accounts[i % len(accounts)], transaction_type='DEPOSIT', amount=Decimal('1.00'),
+                    balance_before=Decimal('0.00'), balance_after=Decimal('1.00'),
+                    transaction_id=f'TXA{connected:d}{i:016d}',
+                )
+        timings.append(time.perf_counter() - start)
+        if not connected:
+            post_save.connect(audit_transaction, sender=Transaction)
+            # Chain the rows written without the signal so verification sees a complete log
+            record_transactions(list(Transaction.objects.order_by('id')))
+    rows.append(('create, no audit', _rate(samples, timings[0])))
+    rows.append(('create + audit entry (signal)', _rate(samples, timings[1])))
+
+    _seed_transactions(accounts, size)
+    start = time.perf_counter()
+    with db_transaction.atomic():
+        recorded = len(record_transactions(list(Transaction.objects.filter(audit_entries__isnull=True).order_by('id'))))
+    rows.append(('bulk append', f'{recorded} entries ({_rate(recorded, time.perf_counter() - start)})'))
+
+    start = time.perf_counter()
+    checked, problems, _found = verify_audit(full=True)
+    elapsed = time.perf_counter() - start
+    rows.append(('full verification',
+                 f'{checked} entries + ledger rows, {problems} problems ({_rate(checked, elapsed)})'))
+
+    new = Transaction.objects.bulk_create([
+        Transaction(account=accounts[i % len(accounts)], transaction_type='DEPOSIT', amount=Decimal('1.00'),
+                    balance_before=Decimal('0.00'), balance_after=Decimal('1.00'), transaction_id=f'TXN{i:017d}')
+        for i in range(max(size // 100, 1))
+    ])
+    record_transactions(new)
+    start = time.perf_counter()
+    checked, problems, _found = verify_audit()
+    elapsed = time.perf_counter() - start
+    rows.append(('incremental verification', f'{checked} new entries + ledger rows in {elapsed * 1000:.1f} ms'))
+    return rows
+
+
+@benchmark('terminal_sync')
+def terminal_sync(size):
+    """Offline terminal journal: authorize rate, sync throughput by batch size, idempotent replay"""
+    import json
+    from datetime import date, timedelta
+
+    from django.test import Client, override_settings
+
+    from .models import Card, TerminalEntry, Transaction
+    from .terminal import OfflineJournal
+
+    accounts = _seed_accounts(100)
+    Card.objects.bulk_create([
+        Card(account=account, card_number=f'8{i:015d}', cvv='123', expiry_date=date.today() + timedelta(days=365),
+             status='BLOCKED' if i == 0 else 'ACTIVE')
+        for i, account in enumerate(accounts)
+    ])
+    card_numbers = [f'8{i:015d}' for i in range(len(accounts))] + ['7000000000000000']  # one unknown card
+    limits = {'per_withdrawal': '100.00', 'per_card_daily': '1000000.00', 'terminal_float': '100000000.00'}
+    client = Client()
+
+    def sender(terminal_id, calls):
+        def send(entries):
+            calls.append(entries)
+            response = client.post('/api/terminal/sync/', json.dumps({'terminal_id': terminal_id, 'entries': entries}),
+                                   content_type='application/json', HTTP_AUTHORIZATION=f'Terminal secret-{terminal_id}')
+            return response.json()['results']
+        return send
+
+    rows = []
+    tokens = {f'T{batch_size}': f'secret-T{batch_size}' for batch_size in (100, 1000)}
+    with tempfile.TemporaryDirectory() as directory, override_settings(TERMINAL_TOKENS=tokens):
+        for batch_size in (100, 1000):
+            terminal_id = f'T{batch_size}'
+            journal = OfflineJournal(os.path.join(directory, f'{terminal_id}.sqlite3'), limits)
+            start = time.perf_counter()
+            for i in range(size):
+                journal.authorize(card_numbers[i % len(card_numbers)], Decimal(i % 10 + 1))
+            if batch_size == 100:
+                rows.append(('offline authorize (fsync each)', _rate(size, time.perf_counter() - start)))
+
+            calls = []
+            start = time.perf_counter()
+            counts = journal.sync(sender(terminal_id, calls), batch_size=batch_size)
+            elapsed = time.perf_counter() - start
+            rows.append((f'sync, batches of {batch_size}',
+                         f'{_rate(size, elapsed)} ({counts["APPLIED"]} applied, {counts["CONFLICT"]} conflicts)'))
+
+            # Lost response: the server applied the batch but the terminal resends it
+            ledger_rows = Transaction.objects.count()
+            start = time.perf_counter()
+            replayed = sender(terminal_id, [])(calls[0])
+            elapsed = time.perf_counter() - start
+            duplicates = Transaction.objects.count() - ledger_rows
+            rows.append((f'replay of a {len(calls[0])}-entry batch',
+                         f'{elapsed * 1000:.1f} ms, {duplicates} duplicate postings, '
+                         f'{sum(result["status"] == "APPLIED" for result in replayed)} reported applied'))
+            journal.close()
+
+    rows.append(('terminal entries stored', f'{TerminalEntry.objects.count()} for {size * 2} journalled'))
+    return rows
+
+
+@benchmark('replica')
+def replica_routing(size):
+    """Mixed history reads and deposits with and without a read replica file: routing and read-your-writes"""
+    import copy
+    from contextlib import ExitStack
+
+    from django.db import connections
+    from django.test import Client, override_settings
+
+    from .models import Transaction
+    from .routers import PIN_SESSION_KEY
+
+    alias = 'bench_replica'
+    accounts = _seed_accounts(20)
+    _seed_transactions(accounts, size)
+    clients = []
+    for account in accounts:
+        client = Client()
+        client.force_login(account.user)
+        session = client.session
+        session['active_account_id'] = account.id
+        session['pin_verified'] = True
+        session.save()
+        clients.append(client)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        # The replica is a snapshot of the primary that is never refreshed, so any
+        # read it serves after a deposit is visibly stale
+        connections.settings[alias] = copy.deepcopy(connections.settings['default'])
+        connections.settings[alias]['NAME'] = os.path.join(directory, 'replica.sqlite3')
+        replica = sqlite3.connect(connections.settings[alias]['NAME'])
+        connections['default'].connection.backup(replica)
+        replica.close()
+        try:
+            for replicas in ([], [alias]):
+                counts = {'default': 0, alias: 0}
+
+                def counter(name):
+                    def wrapper(execute, sql, params, many, context):
+                        counts[name] += 1
+                        return execute(sql, params, many, context)
+                    return wrapper
+
+                latest, violations = {}, 0
+                requests = min(size, 500)
+                with ExitStack() as stack:
+                    stack.enter_context(override_settings(REPLICA_DATABASES=replicas))
+                    for name in counts:
+                        stack.enter_context(connections[name].execute_wrapper(counter(name)))
+                    start = time.perf_counter()
+                    for i in range(requests):
+                        index = i % len(clients)
+                        if i % 5 == 0:
+                            clients[index].post('/deposit/', {'amount': '1.00', 'description': 'bench'})
+                            latest[index] = Transaction.objects.filter(
+                                account=accounts[index]).values_list('transaction_id', flat=True).first()
+                        else:
+                            response = clients[index].get('/transaction-history/')
+                            if index in latest and latest[index].encode() not in response.content:
+                                violations += 1
+                    elapsed = time.perf_counter() - start
+                label = 'replica' if replicas else 'no replica'
+                rows.append((f'{label}: mixed requests', _rate(requests, elapsed)))
+                rows.append((f'{label}: primary/replica queries', f'{counts["default"]}/{counts[alias]}'))
+                rows.append((f'{label}: read-your-writes misses', violations))
+
+            with override_settings(REPLICA_DATABASES=[alias]):
+                session = clients[0].session
+                session[PIN_SESSION_KEY] = 0
+                session.save()
+                stale = latest[0].encode() not in clients[0].get('/transaction-history/').content
+            rows.append(('read after pin expiry', 'replica (stale, as expected)' if stale else 'primary'))
+        finally:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+    return rows
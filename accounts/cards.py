@@ -0,0 +1,157 @@
+"""
+Card runtime and lifecycle helpers.
+
+Card authentication resolves a card number to its card and account ids
+through a bounded cache. Only that mapping is cached: card status, expiry
+and the wrong-PIN count are read from the database with the account, so a
+card blocked or expired by any process is refused at once. Lifecycle processing
+renews expiring cards and expires old ones; both steps select cards through
+the (status, expiry_date) index and work in id-ordered batches, one atomic
+block per batch.
+"""
+import random
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction as db_transaction
+from django.db.models import F
+
+from .models import Account, Card
+
+
+CARD_REJECTED = 'Card or PIN not accepted.'
+
+
+def _card_cache_key(card_number):
+    return f'card:{card_number}'
+
+
+def resolve_card(card_number):
+    """Resolve a card number to its card id and account id"""
+    cache = caches['cards']
+    key = _card_cache_key(card_number)
+    card = cache.get(key)
+    if card is None:
+        card = Card.objects.filter(card_number=card_number).values('id', 'account_id').first()
+        if card is None:
+            return None
+        cache.set(key, card)
+    return card
+
+
+def invalidate_cards(card_numbers):
+    """Drop cached resolutions for the given card numbers (moved to another account or removed)"""
+    caches['cards'].delete_many([_card_cache_key(number) for number in card_numbers])
+
+
+def authenticate_card(card_number, pin):
+    """Return (account, None) for a valid card and PIN, or (None, error message)
+
+    Unknown, blocked and expired cards get the same message as a wrong PIN,
+    so card numbers cannot be probed. CARD_MAX_PIN_ATTEMPTS wrong PINs in a
+    row block the card.
+    """
+    card = resolve_card(card_number)
+    if card is None:
+        return None, CARD_REJECTED
+
+    # The card's current status and expiry are checked in the account lookup itself
+    account = (
+        Account.objects.select_related('user')
+        .only('id', 'pin', 'status', 'account_number', 'user')
+        .filter(id=card['account_id'], cards__id=card['id'], cards__status='ACTIVE',
+                cards__expiry_date__gte=date.today())
+        .annotate(failed_pin_attempts=F('cards__failed_pin_attempts'))
+        .first()
+    )
+    if account is None:
+        return None, CARD_REJECTED
+    if account.pin != pin:
+        record_failed_pin(card['id'])
+        return None, CARD_REJECTED
+    if account.status != 'ACTIVE':
+        return None, 'The account linked to this card is not active.'
+    if account.failed_pin_attempts:
+        Card.objects.filter(id=card['id']).update(failed_pin_attempts=0)
+    return account, None
+
+
+def record_failed_pin(card_id):
+    """Count a wrong PIN and block the card once CARD_MAX_PIN_ATTEMPTS is reached"""
+    with db_transaction.atomic():
+        Card.objects.filter(id=card_id).update(failed_pin_attempts=F('failed_pin_attempts') + 1)
+        Card.objects.filter(
+            id=card_id, status='ACTIVE', failed_pin_attempts__gte=settings.CARD_MAX_PIN_ATTEMPTS
+        ).update(status='BLOCKED')
+
+
+def _random_digits(length):
+    return ''.join(random.choices('0123456789', k=length))
+
+
+def generate_card_numbers(count, lookup_size=5000):
+    """Generate `count` unique card numbers, checking collisions with one query per `lookup_size` numbers"""
+    numbers = set()
+    while len(numbers) < count:
+        candidates = list({_random_digits(16) for _ in range(min(count - len(numbers), lookup_size))} - numbers)
+        taken = set(Card.objects.filter(card_number__in=candidates).values_list('card_number', flat=True))
+        numbers.update(number for number in candidates if number not in taken)
+    return list(numbers)
+
+
+def renew_cards(today, renewal_days=30, batch_size=1000):
+    """Issue replacements for active cards expiring within the renewal window"""
+    renewed = 0
+    last_id = 0
+    expiry_date = today + timedelta(days=Card.VALIDITY_DAYS)
+    while True:
+        with db_transaction.atomic():
+            cards = list(
+                Card.objects.filter(
+                    status='ACTIVE',
+                    expiry_date__lte=today + timedelta(days=renewal_days),
+                    id__gt=last_id,
+                )
+                .filter(replacement__isnull=True, account__status='ACTIVE')
+                .order_by('id')
+                .only('id', 'account_id', 'card_type')[:batch_size]
+            )
+            if not cards:
+                break
+            numbers = generate_card_numbers(len(cards))
+            Card.objects.bulk_create([
+                Card(
+                    account_id=card.account_id,
+                    card_number=number,
+                    card_type=card.card_type,
+                    cvv=_random_digits(3),
+                    expiry_date=expiry_date,
+                    replaces_id=card.id,
+                )
+                for card, number in zip(cards, numbers)
+            ])
+        renewed += len(cards)
+        last_id = cards[-1].id
+    return renewed
+
+
+def expire_cards(today, batch_size=1000):
+    """Mark active cards past their expiry date as EXPIRED"""
+    expired = 0
+    while True:
+        with db_transaction.atomic():
+            card_ids = list(
+                Card.objects.filter(status='ACTIVE', expiry_date__lt=today).values_list('id', flat=True)[:batch_size]
+            )
+            if not card_ids:
+                break
+            expired += Card.objects.filter(id__in=card_ids).update(status='EXPIRED')
+    return expired
+
+
+def process_card_lifecycle(today, renewal_days=30, batch_size=1000):
+    """Renew expiring cards, then expire the ones past their date"""
+    renewed = renew_cards(today, renewal_days, batch_size)
+    expired = expire_cards(today, batch_size)
+    return renewed, expired
@@ -0,0 +1,144 @@
+"""
+End-of-day interest and fee processing.
+
+Balances are read in chunks into NumPy arrays of paise, interest and fees
+are computed for the whole chunk at once from the per-type rules in
+settings.EOD_ACCOUNT_RULES, and the results are written back with
+a single executemany UPDATE plus bulk_create inside one atomic block per
+chunk.
+"""
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction as db_transaction
+from django.utils import timezone
+
+from .audit import record_transactions
+from .batch import plan_partitions, run_partitions
+from .models import Account, BatchCheckpoint, Transaction
+
+
+JOB_NAME = 'eod'
+
+TYPE_CODES = {code: index for index, (code, _label) in enumerate(Account.ACCOUNT_TYPES)}
+
+
+def _rule_arrays():
+    """Per-type rule arrays indexed by TYPE_CODES"""
+    rules = [settings.EOD_ACCOUNT_RULES[code] for code, _label in Account.ACCOUNT_TYPES]
+    rates = np.array([float(rule['annual_interest_rate']) for rule in rules])
+    minimums = np.array([int(Decimal(rule['minimum_balance']) * 100) for rule in rules], dtype=np.int64)
+    fees = np.array([int(Decimal(rule['fee_below_minimum']) * 100) for rule in rules], dtype=np.int64)
+    return rates, minimums, fees
+
+
+def compute_interest_and_fees(type_codes, balances):
+    """Daily interest and fees in paise for arrays of account type codes and balances in paise"""
+    rates, minimums, fees = _rule_arrays()
+    interest = np.floor(balances * rates[type_codes] / 365).astype(np.int64)
+    fee = np.where(balances < minimums[type_codes], np.minimum(fees[type_codes], balances), 0)
+    return interest, fee
+
+
+def _to_decimal(paise):
+    return Decimal(int(paise)).scaleb(-2)
+
+
+def _ledger_id(kind, business_date, account_id):
+    return f'E{kind}{business_date:%y%m%d}{account_id:012d}'
+
+
+def _bulk_update_balances(rows):
+    """Write (balance, updated_at, id) rows with a single executemany
+
+    QuerySet.bulk_update builds one CASE expression per row, which dominates
+    the run time at EOD volumes; a parameterised UPDATE is several times faster.
+    """
+    quote = connection.ops.quote_name
+    table = quote(Account._meta.db_table)
+    sql = f'UPDATE {table} SET {quote("balance")} = %s, {quote("updated_at")} = %s WHERE {quote("id")} = %s'
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def _apply_chunk(rows, business_date, now):
+    """Compute and write one chunk; returns (interest rows, fee rows)"""
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    type_codes = np.fromiter((TYPE_CODES[row[1]] for row in rows), dtype=np.int64, count=len(rows))
+    balances = np.fromiter((int(row[2] * 100) for row in rows), dtype=np.int64, count=len(rows))
+
+    interest, fees = compute_interest_and_fees(type_codes, balances)
+    after_interest = balances + interest
+    after_fees = after_interest - fees
+
+    changed = np.flatnonzero((interest > 0) | (fees > 0))
+    updated_at = connection.ops.adapt_datetimefield_value(now)
+    balances_after = []
+    transactions = []
+    for i in changed:
+        account_id = int(ids[i])
+        balances_after.append((_to_decimal(after_fees[i]), updated_at, account_id))
+        if interest[i]:
+            transactions.append(Transaction(
+                account_id=account_id,
+                transaction_type='INTEREST',
+                amount=_to_decimal(interest[i]),
+                balance_before=_to_decimal(balances[i]),
+                balance_after=_to_decimal(after_interest[i]),
+                description=f'Interest for {business_date}',
+                transaction_id=_ledger_id('I', business_date, account_id),
+            ))
+        if fees[i]:
+            transactions.append(Transaction(
+                account_id=account_id,
+                transaction_type='FEE',
+                amount=_to_decimal(fees[i]),
+                balance_before=_to_decimal(after_interest[i]),
+                balance_after=_to_decimal(after_fees[i]),
+                description=f'Minimum balance fee for {business_date}',
+                transaction_id=_ledger_id('F', business_date, account_id),
+            ))
+
+    _bulk_update_balances(balances_after)
+    record_transactions(Transaction.objects.bulk_create(transactions))
+    return int(np.count_nonzero(interest)), int(np.count_nonzero(fees))
+
+
+def process_partition(checkpoint_id, business_date, chunk_size):
+    """Process one partition chunk by chunk; returns (accounts, interest rows, fee rows)"""
+    checkpoint = BatchCheckpoint.objects.get(id=checkpoint_id)
+    processed = interest_rows = fee_rows = 0
+    last_id = checkpoint.last_processed_id or checkpoint.range_start - 1
+
+    while not checkpoint.completed:
+        with db_transaction.atomic():
+            rows = list(
+                Account.objects.select_for_update()
+                .filter(status='ACTIVE', id__gt=last_id, id__lte=checkpoint.range_end)
+                .order_by('id')
+                .values_list('id', 'account_type', 'balance')[:chunk_size]
+            )
+            if rows:
+                interest_count, fee_count = _apply_chunk(rows, business_date, timezone.now())
+                processed += len(rows)
+                interest_rows += interest_count
+                fee_rows += fee_count
+                last_id = rows[-1][0]
+                checkpoint.last_processed_id = last_id
+            checkpoint.completed = len(rows) < chunk_size
+            checkpoint.save(update_fields=['last_processed_id', 'completed', 'updated_at'])
+
+    return processed, interest_rows, fee_rows
+
+
+def run_eod(business_date, chunk_size=5000, workers=1):
+    """Run (or resume) end-of-day processing for a business date"""
+    checkpoint_ids = plan_partitions(
+        JOB_NAME, business_date.isoformat(), Account.objects.filter(status='ACTIVE'), max(workers, 1)
+    )
+    results = run_partitions(
+        process_partition, checkpoint_ids, workers,
+        business_date=business_date, chunk_size=chunk_size,
+    )
+    return tuple(sum(column) for column in zip(*results)) if results else (0, 0, 0)
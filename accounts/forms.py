@@ -95,6 +95,27 @@ class PINVerificationForm(forms.Form):
     )
 
 
+class CardLoginForm(forms.Form):
+    card_number = forms.CharField(
+        max_length=16, 
+        min_length=16, 
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': '16-digit card number', 'autocomplete': 'off'}), 
+        label="Card Number"
+    )
+    pin = forms.CharField(
+        max_length=4, 
+        min_length=4, 
+        widget=forms.PasswordInput(attrs={'class': 'form-control', 'placeholder': '4-digit PIN'}), 
+        label="PIN"
+    )
+    
+    def clean_card_number(self):
+        card_number = self.cleaned_data['card_number']
+        if not card_number.isdigit():
+            raise forms.ValidationError("Card number must contain only digits")
+        return card_number
+
+
 class DepositForm(forms.Form):
     amount = forms.DecimalField(
         max_digits=12, 
@@ -0,0 +1,94 @@
+"""
+Balance versions for live dashboard updates.
+
+An account's balance version is read from the database: the account's
+updated_at (every balance write sets it, including bulk jobs such as
+end-of-day and queued-credit batches), plus the latest transaction and the
+newest queued credit. It is a single primary-key lookup with indexed
+subqueries, so it is correct across any number of server processes and
+management commands. The polling endpoint and the SSE stream compare
+versions and only build the full snapshot when it changes.
+"""
+import asyncio
+import hashlib
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+
+from .models import Account, PendingCredit, Transaction
+
+
+KEEPALIVE_SECONDS = 15
+
+
+def balance_version(account_id):
+    """Opaque version string for an account's balance and latest transaction, or None if it does not exist"""
+    latest_transaction = Transaction.objects.filter(account=OuterRef('pk')).order_by('-created_at', '-id')
+    latest_credit = PendingCredit.objects.filter(account=OuterRef('pk')).order_by('-id')
+    state = (
+        Account.objects.filter(id=account_id)
+        .annotate(
+            transaction_id=Subquery(latest_transaction.values('id')[:1]),
+            # Admin edits to the latest transaction change its snapshot too
+            transaction_updated_at=Subquery(latest_transaction.values('updated_at')[:1]),
+            credit_id=Subquery(latest_credit.values('id')[:1]),
+        )
+        .values_list('updated_at', 'transaction_id', 'transaction_updated_at', 'credit_id')
+        .first()
+    )
+    if state is None:
+        return None
+    return f'{account_id}-' + hashlib.sha1(repr(state).encode()).hexdigest()[:16]
+
+
+def balance_snapshot(account):
+    """Current balance and latest transaction for an account"""
+    latest = Transaction.objects.filter(account=account).only(
+        'transaction_id', 'transaction_type', 'amount', 'description', 'created_at'
+    ).first()
+    return {
+        'account_number': account.account_number,
+        'balance': str(account.available_balance),
+        'latest_transaction': latest and {
+            'transaction_id': latest.transaction_id,
+            'transaction_type': latest.transaction_type,
+            'amount': str(latest.amount),
+            'description': latest.description,
+            'created_at': latest.created_at.isoformat(),
+        },
+    }
+
+
+def load_snapshot(user, account_id):
+    """Snapshot for one of the user's accounts, or None if it is not theirs"""
+    account = Account.objects.filter(id=account_id, user=user).first()
+    return account and balance_snapshot(account)
+
+
+async def balance_events(user, account_id, last_event_id=None):
+    """Server-sent events for an account: one 'balance' event per change
+
+    Only the version is checked on each tick; the snapshot is read when it
+    moves. The stream ends after BALANCE_STREAM_SECONDS and the browser
+    reconnects with Last-Event-ID, so unchanged data is not resent.
+    """
+    poll = settings.BALANCE_STREAM_POLL_SECONDS
+    deadline = time.monotonic() + settings.BALANCE_STREAM_SECONDS
+    sent, quiet = last_event_id, 0
+    yield f'retry: {int(poll * 1000)}\n\n'
+    while time.monotonic() < deadline:
+        version = await sync_to_async(balance_version, thread_sensitive=False)(account_id)
+        if version != sent:
+            snapshot = await sync_to_async(load_snapshot)(user, account_id)
+            if snapshot is None:
+                return
+            sent, quiet = version, 0
+            yield f'id: {version}\nevent: balance\ndata: {json.dumps(snapshot)}\n\n'
+        elif quiet >= KEEPALIVE_SECONDS:
+            quiet = 0
+            yield ': keep-alive\n\n'
+        await asyncio.sleep(poll)
+        quiet += poll
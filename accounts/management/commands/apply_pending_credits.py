@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Apply queued credits to hot accounts in aggregated batches'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--loop', action='store_true', help='Keep running, polling for new credits')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        from accounts.transfers import apply_pending_credits
+
+        while True:
+            applied = apply_pending_credits(options['batch_size'])
+            if applied:
+                self.stdout.write(f'Applied {applied} pending credits')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from accounts.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    help = 'Run a performance benchmark against a throwaway test database'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', nargs='?', help='Benchmark to run; omit to list them')
+        parser.add_argument('--size', type=int, default=10000, help='Dataset size (rows, cards, writes...)')
+
+    def handle(self, *args, **options):
+        name = options['name']
+        if not name:
+            for bench_name, func in sorted(BENCHMARKS.items()):
+                self.stdout.write(f'{bench_name:<20} {func.__doc__}')
+            return
+        if name not in BENCHMARKS:
+            raise CommandError(f'Unknown benchmark "{name}". Available: {", ".join(sorted(BENCHMARKS))}')
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            rows = BENCHMARKS[name](options['size'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(self.style.SUCCESS(f'{name} (size={options["size"]})'))
+        for label, value in rows:
+            self.stdout.write(f'  {label:<36} {value}')
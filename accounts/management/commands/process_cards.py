@@ -0,0 +1,24 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Issue renewal cards for expiring cards and mark expired cards as EXPIRED'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Processing date as YYYY-MM-DD (default: today)')
+        parser.add_argument('--renewal-days', type=int, default=30, help='Renew cards expiring within this many days')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        from accounts.cards import process_card_lifecycle
+
+        try:
+            today = date.fromisoformat(options['date']) if options['date'] else date.today()
+        except ValueError:
+            raise CommandError('--date must be in YYYY-MM-DD format')
+
+        renewed, expired = process_card_lifecycle(today, options['renewal_days'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Cards {today}: {renewed} renewed, {expired} expired'))
@@ -0,0 +1,65 @@
+import os
+import re
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand
+
+
+TARGETS = {
+    'setup': 'import django; django.setup()',
+    'wsgi': 'import atm_system.wsgi',
+    'first-request': (
+        'import atm_system.wsgi; from django.urls import get_resolver; get_resolver().url_patterns'
+    ),
+}
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+
+
+def profile_imports(code):
+    """Run code in a fresh interpreter under -X importtime
+
+    Returns the wall-clock time of the code in seconds and a list of
+    (module, self us, cumulative us, depth) rows. Modules loaded through
+    importlib.import_module (Django app modules) are not timed by
+    -X importtime themselves, only the imports they trigger, so the
+    wall-clock time is the number to compare.
+    """
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'atm_system.settings'))
+    timed = f'import time; _start = time.perf_counter()\n{code}\nprint(time.perf_counter() - _start)'
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', timed],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    elapsed = float(result.stdout.split()[-1])
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return elapsed, rows
+
+
+class Command(BaseCommand):
+    help = 'Report module import times (python -X importtime) for worker and command startup'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', nargs='?', default='wsgi', choices=sorted(TARGETS))
+        parser.add_argument('--top', type=int, default=20, help='Number of modules to list')
+        parser.add_argument('--prefix', help='Only list modules starting with this prefix, e.g. accounts')
+
+    def handle(self, *args, **options):
+        elapsed, rows = profile_imports(TARGETS[options['target']])
+        self.stdout.write(self.style.SUCCESS(
+            f'{options["target"]}: {elapsed * 1000:.1f} ms, {len(rows)} modules imported'
+        ))
+
+        if options['prefix']:
+            rows = [row for row in rows if row[0].split('.')[0] == options['prefix']]
+
+        self.stdout.write(f'\n{"cumulative ms":>14} {"self ms":>9}  module')
+        for module, self_us, cumulative_us, _depth in sorted(rows, key=lambda row: -row[2])[:options['top']]:
+            self.stdout.write(f'{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {module}')
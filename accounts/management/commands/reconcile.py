@@ -0,0 +1,37 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Reconcile a settlement CSV against the day's deposits and withdrawals"
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('settlement', help='Settlement CSV with transaction_id and amount columns')
+        parser.add_argument('--date', help='Business date as YYYY-MM-DD (default: today)')
+        parser.add_argument('--output', default='reconciliation', help='Directory for the report CSVs')
+        parser.add_argument('--presorted', action='store_true',
+                            help='The file is already sorted by transaction_id; skip the external sort')
+        parser.add_argument('--run-size', type=int, default=500000,
+                            help='Lines sorted in memory at a time when sorting the file')
+
+    def handle(self, *args, **options):
+        from accounts.reconciliation import OUTCOMES, ReconciliationError, reconcile
+
+        try:
+            business_date = date.fromisoformat(options['date']) if options['date'] else date.today()
+        except ValueError:
+            raise CommandError('--date must be in YYYY-MM-DD format')
+
+        try:
+            counts = reconcile(options['settlement'], business_date, options['output'],
+                               presorted=options['presorted'], run_size=options['run_size'])
+        except (OSError, ReconciliationError) as exc:
+            raise CommandError(exc)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Reconciliation {business_date}: '
+            + ', '.join(f'{counts[outcome]} {outcome.replace("_", " ")}' for outcome in OUTCOMES)
+        ))
+        self.stdout.write(f'Reports written to {options["output"]}/')
@@ -0,0 +1,29 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Accrue daily interest and charge fees for all active accounts (restartable)'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Business date as YYYY-MM-DD (default: today)')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--workers', type=int, default=1, help='Number of worker processes')
+
+    def handle(self, *args, **options):
+        from accounts.eod import run_eod
+
+        try:
+            business_date = date.fromisoformat(options['date']) if options['date'] else date.today()
+        except ValueError:
+            raise CommandError('--date must be in YYYY-MM-DD format')
+
+        processed, interest_rows, fee_rows = run_eod(
+            business_date, chunk_size=options['chunk_size'], workers=options['workers']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'EOD {business_date}: {processed} accounts processed, '
+            f'{interest_rows} interest credits, {fee_rows} fees charged'
+        ))
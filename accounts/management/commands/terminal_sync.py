@@ -0,0 +1,38 @@
+import os
+from urllib.error import URLError
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Post a terminal's offline withdrawal journal to the central server"
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('journal', help="Path of the terminal's SQLite journal")
+        parser.add_argument('--url', required=True, help='Central sync endpoint, e.g. https://bank/api/terminal/sync/')
+        parser.add_argument('--terminal-id', required=True)
+        parser.add_argument('--token', default=os.environ.get('TERMINAL_TOKEN'),
+                            help='Terminal secret (default: $TERMINAL_TOKEN)')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        from accounts.terminal import OfflineJournal, http_sender
+
+        if not options['token']:
+            raise CommandError('A terminal token is required (--token or $TERMINAL_TOKEN)')
+
+        journal = OfflineJournal(options['journal'])
+        try:
+            counts = journal.sync(http_sender(options['url'], options['terminal_id'], options['token']),
+                                  batch_size=options['batch_size'])
+        except (OSError, URLError, ValueError) as exc:
+            raise CommandError(f'Sync stopped, remaining entries stay pending: {exc}')
+        finally:
+            journal.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Synced: {counts["APPLIED"]} applied, {counts["CONFLICT"]} conflicts'
+        ))
+        if counts['CONFLICT']:
+            self.stdout.write('Conflicting entries need manual settlement at the branch.')
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Verify the hash-chained audit log (incremental; restartable)'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Number of worker processes')
+        parser.add_argument('--chunk-size', type=int, default=10000)
+        parser.add_argument('--full', action='store_true',
+                            help='Re-verify every entry instead of only those added since the last run')
+
+    def handle(self, *args, **options):
+        from accounts.audit import verify_audit
+
+        checked, problem_count, problems = verify_audit(
+            workers=options['workers'], chunk_size=options['chunk_size'], full=options['full']
+        )
+        for entry_id, account_id, reason in problems:
+            subject = f'Audit entry {entry_id}' if entry_id else 'Audit log'
+            self.stderr.write(f'{subject} (account {account_id}): {reason}')
+        if problem_count:
+            raise CommandError(f'{problem_count} problems found in {checked} audit entries and ledger rows')
+        self.stdout.write(self.style.SUCCESS(
+            f'Audit log verified: {checked} audit entries and ledger rows checked, no problems'
+        ))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_batch_checkpoint_interest_fee'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='replaces',
+            field=models.OneToOneField(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='replacement', to='accounts.card'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['status', 'expiry_date'], name='accounts_ca_status_1e5892_idx'),
+        ),
+    ]
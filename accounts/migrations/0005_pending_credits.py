@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:49
+
+import accounts.money
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_card_lifecycle'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='queue_credits',
+            field=models.BooleanField(default=False, help_text='Queue incoming transfers as pending credits (hot merchant accounts)'),
+        ),
+        migrations.CreateModel(
+            name='PendingCredit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', accounts.money.MoneyField()),
+                ('description', models.TextField(blank=True)),
+                ('applied', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_credits', to='accounts.account')),
+                ('source_account', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='queued_transfers', to='accounts.account')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['applied', 'account'], name='accounts_pe_applied_8aa1d8_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:24
+
+import accounts.money
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_audit_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TerminalEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('terminal_id', models.CharField(max_length=32)),
+                ('entry_id', models.CharField(max_length=64)),
+                ('card_number', models.CharField(max_length=16)),
+                ('amount', accounts.money.MoneyField()),
+                ('performed_at', models.DateTimeField()),
+                ('status', models.CharField(choices=[('APPLIED', 'Applied'), ('CONFLICT', 'Conflict')], max_length=8)),
+                ('reason', models.CharField(blank=True, max_length=100)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('transaction', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='terminal_entry', to='accounts.transaction')),
+            ],
+            options={
+                'verbose_name_plural': 'terminal entries',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'received_at'], name='accounts_te_status_0fee7d_idx')],
+                'unique_together': {('terminal_id', 'entry_id')},
+            },
+        ),
+    ]
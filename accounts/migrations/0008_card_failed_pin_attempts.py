@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_terminal_entries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='failed_pin_attempts',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+    ]
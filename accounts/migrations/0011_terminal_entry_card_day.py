@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_audit_chain_heads'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='terminalentry',
+            index=models.Index(fields=['card_number', 'performed_at'], name='accounts_te_card_nu_6a2b25_idx'),
+        ),
+    ]
@@ -3,6 +3,9 @@ from django.db import models
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 import random
+import secrets
+
+from .money import Money, MoneyField
 
 
 class User(AbstractUser):
@@ -10,6 +13,7 @@ class User(AbstractUser):
     phone_number = models.CharField(max_length=15, blank=True)
     date_of_birth = models.DateField(null=True, blank=True)
     address = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.username} - {self.get_full_name()}"
@@ -35,6 +39,7 @@ class Account(models.Model):
     balance = models.DecimalField(max_digits=12, decimal_places=2, default=0.00, validators=[MinValueValidator(Decimal('0.00'))])
     pin = models.CharField(max_length=4)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='ACTIVE')
+    queue_credits = models.BooleanField(default=False, help_text='Queue incoming transfers as pending credits (hot merchant accounts)')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -43,6 +48,18 @@ class Account(models.Model):
             self.account_number = self.generate_account_number()
         super().save(*args, **kwargs)
     
+    def pending_credit_total(self):
+        """Sum of queued credits not yet applied to the balance"""
+        if not self.queue_credits:
+            return Decimal('0.00')
+        total = self.pending_credits.filter(applied=False).aggregate(total=models.Sum('amount'))['total']
+        return (total or Money()).to_decimal()
+    
+    @property
+    def available_balance(self):
+        """Balance including queued credits"""
+        return self.balance + self.pending_credit_total()
+    
     def generate_account_number(self):
         """Generate a unique 16-digit account number"""
         while True:
@@ -70,12 +87,16 @@ class Card(models.Model):
         ('EXPIRED', 'Expired'),
     ]
     
+    VALIDITY_DAYS = 365 * 3  # 3 years validity
+    
     account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='cards')
     card_number = models.CharField(max_length=16, unique=True, editable=False)
     card_type = models.CharField(max_length=6, choices=CARD_TYPES, default='DEBIT')
     cvv = models.CharField(max_length=3, editable=False)
     expiry_date = models.DateField()
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='ACTIVE')
+    failed_pin_attempts = models.PositiveSmallIntegerField(default=0, editable=False)
+    replaces = models.OneToOneField('self', on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='replacement')
     created_at = models.DateTimeField(auto_now_add=True)
     
     def save(self, *args, **kwargs):
@@ -97,6 +118,9 @@ class Card(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'expiry_date']),
+        ]
 
 
 class Transaction(models.Model):
@@ -106,6 +130,8 @@ class Transaction(models.Model):
         ('WITHDRAWAL', 'Withdrawal'),
         ('TRANSFER', 'Transfer'),
         ('BALANCE_INQUIRY', 'Balance Inquiry'),
+        ('INTEREST', 'Interest'),
+        ('FEE', 'Fee'),
     ]
     
     STATUS_CHOICES = [
@@ -124,6 +150,7 @@ class Transaction(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='SUCCESS')
     transaction_id = models.CharField(max_length=20, unique=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def save(self, *args, **kwargs):
         if not self.transaction_id:
@@ -131,14 +158,145 @@ class Transaction(models.Model):
         super().save(*args, **kwargs)
     
     def generate_transaction_id(self):
-        """Generate a unique transaction ID"""
-        import time
-        timestamp = str(int(time.time()))
-        random_num = ''.join([str(random.randint(0, 9)) for _ in range(6)])
-        return f"TXN{timestamp}{random_num}"
+        """Generate a unique transaction ID: TXN + 17 random hex digits (68 bits)
+
+        A timestamp prefix left only 6 random digits per second, which collided
+        at a few hundred postings a second.
+        """
+        return f"TXN{secrets.token_hex(9)[:17].upper()}"
     
     def __str__(self):
         return f"{self.transaction_id} - {self.transaction_type} - {self.amount}"
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['account', 'created_at']),
+            models.Index(fields=['created_at']),
+        ]
+
+
+class BatchCheckpoint(models.Model):
+    """Progress of one id-range partition of a restartable batch job"""
+    job = models.CharField(max_length=50)
+    run_key = models.CharField(max_length=50)
+    range_start = models.BigIntegerField()
+    range_end = models.BigIntegerField()
+    last_processed_id = models.BigIntegerField(null=True, blank=True)
+    completed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.job} {self.run_key} [{self.range_start}-{self.range_end}]"
+    
+    class Meta:
+        ordering = ['job', 'run_key', 'range_start']
+        unique_together = [('job', 'run_key', 'range_start')]
+
+
+class PendingCredit(models.Model):
+    """Append-only queued credit to a hot account, applied in batches by a worker"""
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='pending_credits')
+    amount = MoneyField()
+    source_account = models.ForeignKey(Account, on_delete=models.SET_NULL, null=True, blank=True, related_name='queued_transfers')
+    description = models.TextField(blank=True)
+    applied = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.account.account_number} +{self.amount}"
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['applied', 'account']),
+        ]
+
+
+class AuditEntryQuerySet(models.QuerySet):
+    """Audit entries can be appended but never updated or deleted in bulk"""
+    
+    def update(self, **kwargs):
+        raise ValueError('Audit entries are append-only')
+    
+    def delete(self):
+        raise ValueError('Audit entries are append-only')
+
+
+class AuditEntry(models.Model):
+    """Append-only record of a ledger write, hash-chained per account"""
+    EVENTS = [
+        ('CREATE', 'Created'),
+        ('UPDATE', 'Updated'),
+    ]
+    
+    GENESIS_HASH = '0' * 64
+    
+    account = models.ForeignKey(Account, on_delete=models.PROTECT, related_name='audit_entries')
+    transaction = models.ForeignKey(Transaction, on_delete=models.PROTECT, related_name='audit_entries')
+    sequence = models.PositiveBigIntegerField()
+    event = models.CharField(max_length=6, choices=EVENTS)
+    payload = models.TextField()
+    prev_hash = models.CharField(max_length=64)
+    hash = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    objects = AuditEntryQuerySet.as_manager()
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Audit entries are append-only')
+        super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        raise ValueError('Audit entries are append-only')
+    
+    def __str__(self):
+        return f"{self.account.account_number} #{self.sequence} {self.event} {self.hash[:12]}"
+    
+    class Meta:
+        ordering = ['id']
+        unique_together = [('account', 'sequence')]
+        verbose_name_plural = 'audit entries'
+
+
+class AuditChainHead(models.Model):
+    """Newest verified entry of an account's audit chain, so a chain cut short is noticed"""
+    account = models.OneToOneField(Account, on_delete=models.PROTECT, related_name='audit_head')
+    sequence = models.PositiveBigIntegerField()
+    hash = models.CharField(max_length=64)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.account_id} #{self.sequence} {self.hash[:12]}"
+
+
+class TerminalEntry(models.Model):
+    """Offline withdrawal journal entry received from a branch terminal"""
+    STATUS_CHOICES = [
+        ('APPLIED', 'Applied'),
+        ('CONFLICT', 'Conflict'),
+    ]
+    
+    terminal_id = models.CharField(max_length=32)
+    entry_id = models.CharField(max_length=64)
+    card_number = models.CharField(max_length=16)
+    amount = MoneyField()
+    performed_at = models.DateTimeField()
+    status = models.CharField(max_length=8, choices=STATUS_CHOICES)
+    reason = models.CharField(max_length=100, blank=True)
+    transaction = models.OneToOneField(Transaction, on_delete=models.PROTECT, null=True, blank=True, related_name='terminal_entry')
+    received_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.terminal_id}/{self.entry_id} {self.status}"
+    
+    class Meta:
+        ordering = ['id']
+        unique_together = [('terminal_id', 'entry_id')]
+        verbose_name_plural = 'terminal entries'
+        indexes = [
+            models.Index(fields=['status', 'received_at']),
+            # Per-card daily totals at sync
+            models.Index(fields=['card_number', 'performed_at']),
+        ]
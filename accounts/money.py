@@ -0,0 +1,127 @@
+"""
+Integer minor-unit (paise) money representation.
+
+Money is a small immutable value type for ledger arithmetic, and MoneyField
+stores it in a BIGINT column. The existing DecimalField columns are
+unchanged; use these for new ledger tables and batch computations, and
+convert with Money.from_decimal()/to_decimal() at the boundaries.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+from functools import total_ordering
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import models
+
+
+@total_ordering
+class Money:
+    """Immutable amount in paise"""
+    __slots__ = ('paise',)
+
+    def __init__(self, paise=0):
+        object.__setattr__(self, 'paise', int(paise))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Money is immutable')
+
+    @classmethod
+    def from_decimal(cls, value):
+        """Convert a rupee amount (Decimal, str or int) to Money, rounding half up to the paisa"""
+        return cls(int(Decimal(value).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP).scaleb(2)))
+
+    def to_decimal(self):
+        return Decimal(self.paise).scaleb(-2)
+
+    def __add__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return _money(self.paise + other.paise)
+
+    def __sub__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return _money(self.paise - other.paise)
+
+    def __mul__(self, factor):
+        if not isinstance(factor, int):
+            return NotImplemented
+        return _money(self.paise * factor)
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return _money(-self.paise)
+
+    def __bool__(self):
+        return self.paise != 0
+
+    def __eq__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.paise == other.paise
+
+    def __lt__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.paise < other.paise
+
+    def __hash__(self):
+        return hash(self.paise)
+
+    def __reduce__(self):
+        return (Money, (self.paise,))
+
+    def __str__(self):
+        sign = '-' if self.paise < 0 else ''
+        rupees, paise = divmod(abs(self.paise), 100)
+        return f'{sign}{rupees}.{paise:02d}'
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+
+_new_object = object.__new__
+_set_paise = Money.paise.__set__
+
+
+def _money(paise):
+    """Money from an int computed inside this module, skipping __init__'s int() and __setattr__ guard"""
+    money = _new_object(Money)
+    _set_paise(money, paise)
+    return money
+
+
+class MoneyField(models.BigIntegerField):
+    """Money stored as integer paise"""
+    description = 'Amount in integer paise'
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else _money(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, Money):
+            return value
+        if isinstance(value, int):
+            return Money(value)
+        try:
+            return Money.from_decimal(value)
+        except ArithmeticError:
+            raise ValidationError(f'"{value}" is not a valid amount.', code='invalid')
+
+    @property
+    def validators(self):
+        # Skip the BIGINT range validators, which compare against plain ints
+        return [*self.default_validators, *self._validators]
+
+    def get_prep_value(self, value):
+        if value is None or isinstance(value, (int, models.expressions.Combinable)):
+            return value
+        return self.to_python(value).paise
+
+    def formfield(self, **kwargs):
+        # A rupee input; to_python() turns the cleaned Decimal into Money. This
+        # bypasses BigIntegerField.formfield, whose min/max bounds are in paise.
+        return models.Field.formfield(self, **{
+            'form_class': forms.DecimalField, 'max_digits': 17, 'decimal_places': 2, **kwargs,
+        })
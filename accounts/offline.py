@@ -0,0 +1,210 @@
+"""
+Server side of offline terminal sync.
+
+Terminals post batches of withdrawals they journalled while offline (see
+accounts.terminal). apply_terminal_batch() posts a whole batch in one atomic
+block: cards are resolved and accounts locked in bulk, each account's
+balance is written once, and ledger rows, audit entries and TerminalEntry
+records are bulk-inserted.
+
+Entries are keyed by (terminal, entry_id) and ledger ids are derived from
+that key, so resending a batch returns the stored results and never posts
+twice. Entries the server will not post (invalid fields, unknown or blocked
+card, inactive account, insufficient funds, over the per-withdrawal or
+per-card daily offline limit) come back as conflicts for the branch to
+settle manually. The daily limit counts a card's offline withdrawals from
+every terminal.
+"""
+import hashlib
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .audit import record_transactions
+from .models import Account, Card, TerminalEntry, Transaction
+from .money import Money
+
+
+ONE_DAY = timedelta(days=1)
+
+
+class TerminalSyncError(ValueError):
+    """A sync batch is malformed"""
+
+
+def offline_transaction_id(terminal_id, entry_id):
+    """Deterministic 20-character ledger id for a terminal journal entry"""
+    return 'OF' + hashlib.sha1(f'{terminal_id}:{entry_id}'.encode('utf-8')).hexdigest()[:18].upper()
+
+
+def _parse_entry(entry):
+    """(card_number, Money, performed_at, problem) for one wire entry; problem is '' if it is valid"""
+    try:
+        card_number, amount = str(entry['card_number']), entry['amount']
+        performed_at = parse_datetime(entry['performed_at'])
+    except (KeyError, TypeError, ValueError):
+        return None, None, None, 'invalid entry'
+    if not card_number.isdigit() or len(card_number) > 16:
+        return None, None, None, 'invalid card number'
+    if not isinstance(amount, int) or isinstance(amount, bool) or amount <= 0:
+        return None, None, None, 'invalid amount'
+    if performed_at is None or timezone.is_naive(performed_at):
+        return None, None, None, 'invalid timestamp'
+    return card_number, Money(amount), performed_at, ''
+
+
+def parse_entries(entries):
+    """Validate wire entries; returns (entry_id, card_number, Money, performed_at, problem) tuples
+
+    Only a batch that is not a list of entries with ids is rejected. An entry
+    with invalid fields comes back with a problem and is answered as a
+    conflict, so it cannot hold back the rest of the terminal's journal.
+    """
+    if not isinstance(entries, list):
+        raise TerminalSyncError('entries must be a list')
+    if len(entries) > settings.TERMINAL_SYNC_MAX_BATCH:
+        raise TerminalSyncError(f'At most {settings.TERMINAL_SYNC_MAX_BATCH} entries per batch')
+    parsed = []
+    for position, entry in enumerate(entries):
+        try:
+            entry_id = str(entry['entry_id'])
+        except (KeyError, TypeError):
+            raise TerminalSyncError(f'Entry {position} has no entry_id')
+        if not 0 < len(entry_id) <= 64:
+            raise TerminalSyncError(f'Entry {position} has an invalid entry_id')
+        parsed.append((entry_id, *_parse_entry(entry)))
+    return parsed
+
+
+def _result(entry):
+    return {
+        'entry_id': entry.entry_id,
+        'status': entry.status,
+        'reason': entry.reason,
+        'transaction_id': entry.transaction.transaction_id if entry.transaction_id else None,
+    }
+
+
+def apply_terminal_batch(terminal_id, entries):
+    """Post a batch of offline withdrawals; returns one result per entry, in order
+
+    Safe to call again with the same batch. A batch racing an identical one
+    from a retried request is re-run once, which then only replays.
+    """
+    parsed = parse_entries(entries)
+    try:
+        return _apply(terminal_id, parsed)
+    except IntegrityError:
+        return _apply(terminal_id, parsed)
+
+
+def _applied_by_card(parsed):
+    """Offline withdrawals already applied for the batch's cards around its dates: card -> [(performed_at, Money)]"""
+    valid = [entry for entry in parsed if not entry[4]]
+    applied = defaultdict(list)
+    if not valid:
+        return applied
+    times = [entry[3] for entry in valid]
+    for card_number, performed_at, amount in TerminalEntry.objects.filter(
+        status='APPLIED', card_number__in={entry[1] for entry in valid},
+        performed_at__gte=min(times) - ONE_DAY, performed_at__lt=max(times) + ONE_DAY,
+    ).values_list('card_number', 'performed_at', 'amount'):
+        applied[card_number].append((performed_at, amount))
+    return applied
+
+
+def _apply(terminal_id, parsed):
+    limit = Money.from_decimal(settings.TERMINAL_OFFLINE_LIMITS['per_withdrawal'])
+    daily_limit = Money.from_decimal(settings.TERMINAL_OFFLINE_LIMITS['per_card_daily'])
+    with db_transaction.atomic():
+        cards = {
+            card['card_number']: card
+            for card in Card.objects.filter(card_number__in={entry[1] for entry in parsed if not entry[4]})
+            .values('card_number', 'account_id', 'status', 'expiry_date')
+        }
+        # Lock before looking for replays, so a concurrent copy of this batch has committed
+        accounts = Account.objects.select_for_update().in_bulk({card['account_id'] for card in cards.values()})
+        stored = {
+            entry.entry_id: entry
+            for entry in TerminalEntry.objects.select_related('transaction').filter(
+                terminal_id=terminal_id, entry_id__in=[entry[0] for entry in parsed]
+            )
+        }
+        # The daily limit spans terminals; read after locking, like the balances
+        applied = _applied_by_card(parsed)
+
+        balances = {account_id: account.balance for account_id, account in accounts.items()}
+        day_totals = {}
+        debits = defaultdict(Money)
+        transactions, new_entries = [], []
+        for entry_id, card_number, amount, performed_at, problem in parsed:
+            if entry_id in stored:
+                continue
+            if problem:
+                # Answered as a conflict but not stored: it has no valid fields to keep
+                stored[entry_id] = TerminalEntry(terminal_id=terminal_id, entry_id=entry_id,
+                                                 status='CONFLICT', reason=problem)
+                continue
+            # A card's day is the calendar day at the terminal's UTC offset
+            day_start = performed_at.replace(hour=0, minute=0, second=0, microsecond=0)
+            day = (card_number, day_start)
+            if day not in day_totals:
+                day_totals[day] = sum((
+                    applied_amount for applied_at, applied_amount in applied[card_number]
+                    if day_start <= applied_at < day_start + ONE_DAY
+                ), Money())
+            card = cards.get(card_number)
+            account = card and accounts.get(card['account_id'])
+            decimal_amount = amount.to_decimal()
+            if card is None or account is None:
+                reason = 'unknown card'
+            elif card['status'] != 'ACTIVE':
+                reason = f'card {card["status"].lower()}'
+            elif card['expiry_date'] < performed_at.date():
+                reason = 'card expired'
+            elif account.status != 'ACTIVE':
+                reason = f'account {account.status.lower()}'
+            elif amount > limit:
+                reason = 'over offline limit'
+            elif day_totals[day] + amount > daily_limit:
+                reason = 'over offline daily limit'
+            elif decimal_amount > balances[account.id]:
+                reason = 'insufficient funds'
+            else:
+                reason = ''
+
+            terminal_entry = TerminalEntry(
+                terminal_id=terminal_id, entry_id=entry_id, card_number=card_number, amount=amount,
+                performed_at=performed_at, status='CONFLICT' if reason else 'APPLIED', reason=reason,
+            )
+            if not reason:
+                balance_before = balances[account.id]
+                balances[account.id] = balance_before - decimal_amount
+                debits[account.id] += amount
+                day_totals[day] += amount
+                terminal_entry.transaction = Transaction(
+                    account=account,
+                    transaction_type='WITHDRAWAL',
+                    amount=decimal_amount,
+                    balance_before=balance_before,
+                    balance_after=balances[account.id],
+                    description=f'Offline withdrawal at terminal {terminal_id}',
+                    transaction_id=offline_transaction_id(terminal_id, entry_id),
+                )
+                transactions.append(terminal_entry.transaction)
+            new_entries.append(terminal_entry)
+            stored[entry_id] = terminal_entry
+
+        now = timezone.now()
+        for account_id, total in debits.items():
+            # One row write per account per batch
+            Account.objects.filter(id=account_id).update(balance=F('balance') - total.to_decimal(), updated_at=now)
+        record_transactions(Transaction.objects.bulk_create(transactions))
+        TerminalEntry.objects.bulk_create(new_entries)
+
+    return [_result(stored[entry[0]]) for entry in parsed]
@@ -0,0 +1,179 @@
+"""
+Opt-in request profiling.
+
+ProfilingMiddleware profiles a request with cProfile and records the SQL
+timeline for every database alias when either a staff user sends the
+PROFILING_HEADER header, or the request is picked by PROFILING_SAMPLE_RATE.
+Traces are written to PROFILING_DIR as a pstats file (open it with snakeviz
+or flameprof for an icicle/flame graph) plus a JSON summary, and only the
+newest PROFILING_MAX_TRACES are kept.
+"""
+import io
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+
+TRACE_ID = re.compile(r'^\d{19}-[0-9a-f]{6}$')
+MAX_SQL_ENTRIES = 5000
+
+# cProfile cannot run twice at once in one process (3.12+), and one profiled
+# request at a time also bounds the overhead under sampling
+_profiling = threading.Lock()
+
+
+class TraceStore:
+    """Bounded on-disk ring buffer of request traces"""
+
+    def __init__(self, directory=None, max_traces=None):
+        self.directory = Path(directory or settings.PROFILING_DIR)
+        self.max_traces = max_traces or settings.PROFILING_MAX_TRACES
+
+    def path(self, trace_id, kind):
+        """Path of a trace file ('json' summary or 'prof' stats), or None for a bad id"""
+        if not TRACE_ID.match(trace_id) or kind not in ('json', 'prof'):
+            return None
+        return self.directory / f'{trace_id}.{kind}'
+
+    def save(self, profiler, summary):
+        """Write a trace and drop the oldest ones beyond max_traces; returns the trace id"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        trace_id = f'{time.time_ns():019d}-{uuid.uuid4().hex[:6]}'
+        profiler.dump_stats(self.path(trace_id, 'prof'))
+        # The summary is written last; a trace is listed once it exists
+        json_path = self.path(trace_id, 'json')
+        temp_path = json_path.with_suffix('.tmp')
+        temp_path.write_text(json.dumps(dict(summary, id=trace_id)))
+        os.replace(temp_path, json_path)
+        self.prune()
+        return trace_id
+
+    def trace_ids(self):
+        """Stored trace ids, newest first"""
+        return sorted((path.stem for path in self.directory.glob('*.json') if TRACE_ID.match(path.stem)),
+                      reverse=True)
+
+    def prune(self):
+        for trace_id in self.trace_ids()[self.max_traces:]:
+            for kind in ('json', 'prof'):
+                self.path(trace_id, kind).unlink(missing_ok=True)
+
+    def summaries(self):
+        """Summaries of all stored traces, newest first, without the SQL timeline"""
+        summaries = []
+        for trace_id in self.trace_ids():
+            summary = self.load(trace_id)
+            if summary:
+                summary.pop('sql', None)
+                summaries.append(summary)
+        return summaries
+
+    def load(self, trace_id):
+        path = self.path(trace_id, 'json')
+        try:
+            return json.loads(path.read_text()) if path else None
+        except FileNotFoundError:
+            return None
+
+    def function_stats(self, trace_id, limit=40, sort='cumulative'):
+        """pstats report of the most expensive functions as text"""
+        import pstats
+
+        output = io.StringIO()
+        stats = pstats.Stats(str(self.path(trace_id, 'prof')), stream=output)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+
+class SQLTimeline:
+    """Database execute wrapper recording when each query ran and how long it took"""
+
+    def __init__(self, alias, start):
+        self.alias = alias
+        self.start = start
+        self.entries = []
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            if len(self.entries) < MAX_SQL_ENTRIES:
+                self.entries.append({
+                    'alias': self.alias,
+                    'offset_ms': round((started - self.start) * 1000, 3),
+                    'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+                    'sql': sql,
+                    'many': many,
+                })
+
+
+class ProfilingMiddleware:
+    """Profile requests on demand (staff header) or by sampling"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.store = TraceStore()
+
+    def _trigger(self, request):
+        user = getattr(request, 'user', None)
+        if request.headers.get(settings.PROFILING_HEADER) and user is not None and user.is_staff:
+            return 'header'
+        if settings.PROFILING_SAMPLE_RATE and random.random() < settings.PROFILING_SAMPLE_RATE:
+            return 'sample'
+        return None
+
+    def __call__(self, request):
+        trigger = self._trigger(request)
+        if trigger is None or not _profiling.acquire(blocking=False):
+            return self.get_response(request)
+
+        import cProfile  # only workers that actually profile pay for it
+
+        try:
+            start = time.perf_counter()
+            timelines = [SQLTimeline(alias, start) for alias in connections]
+            profiler = cProfile.Profile()
+            with ExitStack() as stack:
+                for timeline in timelines:
+                    stack.enter_context(connections[timeline.alias].execute_wrapper(timeline))
+                profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    profiler.disable()
+            elapsed = time.perf_counter() - start
+        finally:
+            _profiling.release()
+
+        sql = sorted((entry for timeline in timelines for entry in timeline.entries),
+                     key=lambda entry: entry['offset_ms'])
+        match = request.resolver_match
+        trace_id = self.store.save(profiler, {
+            'created_at': timezone.now().isoformat(timespec='seconds'),
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else '',
+            'status': response.status_code,
+            'user': request.user.get_username() if request.user.is_authenticated else '',
+            'trigger': trigger,
+            'duration_ms': round(elapsed * 1000, 3),
+            'sql_count': sum(timeline.count for timeline in timelines),
+            'sql_ms': round(sum(entry['duration_ms'] for entry in sql), 3),
+            'sql': sql,
+        })
+        if trigger == 'header':
+            response['X-Profile-Id'] = trace_id
+        return response
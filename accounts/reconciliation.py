@@ -0,0 +1,192 @@
+"""
+Daily reconciliation of switch/network settlement files against the ledger.
+
+The settlement CSV and the day's successful deposits and withdrawals are
+both streamed in transaction_id order and merge-joined, so memory stays
+bounded regardless of file size. An unsorted settlement file is first
+external-sorted into temporary runs of at most `run_size` lines. Amounts are
+compared as integer paise.
+
+Settlement files need a header with transaction_id and amount columns; an
+optional transaction_type column is compared as well.
+"""
+import csv
+import heapq
+import os
+import tempfile
+from collections import Counter
+from contextlib import ExitStack
+from datetime import datetime, time, timedelta
+from itertools import islice
+from operator import itemgetter
+
+from django.db.models import BigIntegerField, F
+from django.db.models.functions import Cast, Round
+from django.utils import timezone
+
+from .models import Transaction
+from .money import Money
+
+
+RECONCILED_TYPES = ('DEPOSIT', 'WITHDRAWAL')
+
+MATCHED = 'matched'
+MISSING_IN_LEDGER = 'missing_in_ledger'
+MISSING_IN_SETTLEMENT = 'missing_in_settlement'
+MISMATCHED = 'mismatched'
+OUTCOMES = (MATCHED, MISSING_IN_LEDGER, MISSING_IN_SETTLEMENT, MISMATCHED)
+
+REPORT_HEADER = ['transaction_id', 'settlement_line', 'settlement_type', 'settlement_amount',
+                 'account_number', 'ledger_type', 'ledger_amount', 'reason']
+
+
+class ReconciliationError(ValueError):
+    """The inputs cannot be reconciled (bad header, unsorted input)"""
+
+
+def read_settlement(path):
+    """Yield (transaction_id, amount, transaction_type, line) rows from a settlement CSV"""
+    with open(path, newline='') as settlement:
+        reader = csv.reader(settlement)
+        header = [column.strip().lower() for column in next(reader, [])]
+        try:
+            id_column, amount_column = header.index('transaction_id'), header.index('amount')
+        except ValueError:
+            raise ReconciliationError('Settlement file needs transaction_id and amount columns')
+        type_column = header.index('transaction_type') if 'transaction_type' in header else None
+        width = max(id_column, amount_column, type_column or 0) + 1
+        for line, row in enumerate(reader, start=2):
+            if not row:
+                continue
+            if len(row) < width:
+                raise ReconciliationError(f'Settlement line {line} has {len(row)} columns, expected {width}')
+            yield (row[id_column].strip(), row[amount_column].strip(),
+                   row[type_column].strip().upper() if type_column is not None else '', str(line))
+
+
+def sorted_settlement(path, run_size=500000):
+    """Settlement rows in transaction_id order, using at most run_size rows in memory
+
+    Yields from a context so the temporary run files are removed when the
+    generator is exhausted or closed.
+    """
+    rows = read_settlement(path)
+    with ExitStack() as stack:
+        directory = stack.enter_context(tempfile.TemporaryDirectory(prefix='reconcile-'))
+        runs = []
+        while True:
+            chunk = sorted(islice(rows, run_size), key=itemgetter(0))
+            if not chunk:
+                break
+            if not runs and len(chunk) < run_size:
+                # Fits in a single run: no temporary files needed
+                yield from chunk
+                return
+            run_path = os.path.join(directory, f'run-{len(runs)}.csv')
+            with open(run_path, 'w', newline='') as run:
+                csv.writer(run).writerows(chunk)
+            runs.append(run_path)
+        readers = [map(tuple, csv.reader(stack.enter_context(open(run_path, newline=''))))
+                   for run_path in runs]
+        yield from heapq.merge(*readers, key=itemgetter(0))
+
+
+def ledger_rows(business_date, chunk_size=10000):
+    """Yield (transaction_id, paise, transaction_type, account_number) for a day's ledger, by id
+
+    Amounts are converted to paise in SQL, which skips the per-row Decimal
+    conversion.
+    """
+    start = timezone.make_aware(datetime.combine(business_date, time.min))
+    queryset = (
+        Transaction.objects
+        .filter(transaction_type__in=RECONCILED_TYPES, status='SUCCESS',
+                created_at__gte=start, created_at__lt=start + timedelta(days=1))
+        .order_by('transaction_id')
+        .annotate(paise=Cast(Round(F('amount') * 100), BigIntegerField()))
+        .values_list('transaction_id', 'paise', 'transaction_type', 'account__account_number')
+    )
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+def _in_order(rows, source):
+    """Pass rows through, failing if they are not sorted by key"""
+    previous = ''
+    for row in rows:
+        if row[0] < previous:
+            raise ReconciliationError(
+                f'{source} rows are not sorted by transaction_id ({row[0]!r} after {previous!r})'
+            )
+        previous = row[0]
+        yield row
+
+
+def _paise(amount):
+    """Settlement amount text in paise, or None if it is not a number"""
+    rupees, _, fraction = amount.partition('.')
+    if rupees.isdigit() and len(fraction) == 2 and fraction.isdigit():
+        return int(rupees) * 100 + int(fraction)  # common "123.45" case without Decimal
+    try:
+        return Money.from_decimal(amount).paise
+    except ArithmeticError:
+        return None
+
+
+def merge_join(settlement, ledger):
+    """Yield (outcome, settlement_row, ledger_row, reason) for two streams sorted by transaction_id
+
+    Settlement rows come from read_settlement() and ledger rows, with amounts
+    in paise, from ledger_rows().
+    """
+    settlement = _in_order(settlement, 'Settlement')
+    ledger = _in_order(ledger, 'Ledger')
+    external, internal = next(settlement, None), next(ledger, None)
+    previous_id = None
+    while external is not None or internal is not None:
+        if internal is None or (external is not None and external[0] < internal[0]):
+            if external[0] == previous_id:
+                yield MISMATCHED, external, None, 'duplicate settlement line'
+            else:
+                yield MISSING_IN_LEDGER, external, None, ''
+            previous_id = external[0]
+            external = next(settlement, None)
+        elif external is None or internal[0] < external[0]:
+            yield MISSING_IN_SETTLEMENT, None, internal, ''
+            internal = next(ledger, None)
+        else:
+            paise = _paise(external[1])
+            if paise is None:
+                yield MISMATCHED, external, internal, 'invalid settlement amount'
+            elif paise != internal[1]:
+                yield MISMATCHED, external, internal, 'amount'
+            elif external[2] and external[2] != internal[2]:
+                yield MISMATCHED, external, internal, 'transaction type'
+            else:
+                yield MATCHED, external, internal, ''
+            previous_id = external[0]
+            external, internal = next(settlement, None), next(ledger, None)
+
+
+def reconcile(settlement_path, business_date, output_dir, presorted=False, run_size=500000):
+    """Reconcile a settlement file against a business day and write one CSV report per outcome
+
+    Returns a Counter of outcomes.
+    """
+    settlement = read_settlement(settlement_path) if presorted else sorted_settlement(settlement_path, run_size)
+    counts = Counter({outcome: 0 for outcome in OUTCOMES})
+    os.makedirs(output_dir, exist_ok=True)
+    with ExitStack() as stack:
+        writers = {}
+        for outcome in OUTCOMES:
+            report = stack.enter_context(open(os.path.join(output_dir, f'{outcome}.csv'), 'w', newline=''))
+            writers[outcome] = csv.writer(report)
+            writers[outcome].writerow(REPORT_HEADER)
+        for outcome, external, internal, reason in merge_join(settlement, ledger_rows(business_date)):
+            counts[outcome] += 1
+            transaction_id = (external or internal)[0]
+            ledger_amount = str(Money(internal[1])) if internal else ''
+            external = external or ('', '', '', '')
+            internal = internal or ('', '', '', '')
+            writers[outcome].writerow([transaction_id, external[3], external[2], external[1],
+                                       internal[3], internal[2], ledger_amount, reason])
+    return counts
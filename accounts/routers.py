@@ -0,0 +1,73 @@
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+
+# Per-request routing state, set up by ReplicaPinningMiddleware
+_request_state = ContextVar('replica_request_state', default=None)
+
+PIN_SESSION_KEY = 'db_primary_pinned_until'
+
+
+class ReplicaRouter:
+    """Send reads from replica-enabled views to read replicas, everything else to the primary"""
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        replicas = getattr(settings, 'REPLICA_DATABASES', [])
+        if state and state['use_replica'] and not state['pinned'] and replicas:
+            return random.choice(replicas)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        # Session saves happen on every request and must not pin the user
+        if state is not None and model._meta.app_label != 'sessions':
+            state['wrote'] = True
+            state['pinned'] = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaPinningMiddleware:
+    """Pin a user's reads to the primary for a short window after they write"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned_until = request.session.get(PIN_SESSION_KEY, 0)
+        state = {'use_replica': False, 'pinned': pinned_until > time.time(), 'wrote': False}
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+
+        if state['wrote']:
+            request.session[PIN_SESSION_KEY] = time.time() + settings.REPLICA_PIN_SECONDS
+        return response
+
+
+def read_from_replica(view_func):
+    """Allow a read-only view to be served from a read replica"""
+    @wraps(view_func)
+    def wrapper(*args, **kwargs):
+        state = _request_state.get()
+        if state is None:
+            return view_func(*args, **kwargs)
+        previous = state['use_replica']
+        state['use_replica'] = True
+        try:
+            return view_func(*args, **kwargs)
+        finally:
+            state['use_replica'] = previous
+    return wrapper
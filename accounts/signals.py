@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .audit import record_transactions
+from .cards import invalidate_cards
+from .models import Card, Transaction
+
+
+@receiver(post_save, sender=Card)
+@receiver(post_delete, sender=Card)
+def invalidate_card_cache(sender, instance, **kwargs):
+    """Drop the cached card resolution when a card is moved to another account or removed"""
+    invalidate_cards([instance.card_number])
+
+
+@receiver(post_save, sender=Transaction)
+def audit_transaction(sender, instance, created, raw=False, **kwargs):
+    """Append a hash-chained audit entry in the same atomic block as the ledger write"""
+    if not raw:
+        record_transactions([instance], 'CREATE' if created else 'UPDATE')
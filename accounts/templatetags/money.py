@@ -0,0 +1,18 @@
+from decimal import InvalidOperation
+
+from django import template
+
+from accounts.money import Money
+
+register = template.Library()
+
+
+@register.filter
+def rupees(value):
+    """Format Money or a rupee amount as ₹1234.50"""
+    if isinstance(value, Money):
+        return f'₹{value}'
+    try:
+        return f'₹{Money.from_decimal(value)}'
+    except (TypeError, ValueError, InvalidOperation):
+        return ''
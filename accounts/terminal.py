@@ -0,0 +1,169 @@
+"""
+Store-and-forward journal for branch terminals.
+
+While the central server is unreachable a terminal pre-authorizes
+withdrawals against TERMINAL_OFFLINE_LIMITS and records them in a local
+SQLite journal (stdlib sqlite3 only, no Django database). sync() later
+posts pending entries in batches to the server's /api/terminal/sync/
+endpoint, which applies them idempotently, so a batch whose response was
+lost can simply be sent again.
+
+Card and PIN checks that the terminal can do offline (chip, offline PIN)
+happen before authorize(); the journal only enforces amounts.
+"""
+import json
+import sqlite3
+import urllib.request
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+
+from .money import Money
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal (
+    entry_id TEXT PRIMARY KEY,
+    card_number TEXT NOT NULL,
+    amount_paise INTEGER NOT NULL,
+    performed_at TEXT NOT NULL,
+    business_date TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'PENDING',
+    reason TEXT NOT NULL DEFAULT '',
+    transaction_id TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS journal_card_day ON journal (card_number, business_date);
+CREATE INDEX IF NOT EXISTS journal_status ON journal (status);
+"""
+
+
+class OfflineLimitError(ValueError):
+    """A withdrawal exceeds the terminal's offline limits"""
+
+
+class OfflineEntryError(ValueError):
+    """A withdrawal cannot be journalled as given (card number or timestamp the server would reject)"""
+
+
+class OfflineJournal:
+    """Local journal of withdrawals authorized while offline"""
+
+    def __init__(self, path, limits=None):
+        limits = limits or settings.TERMINAL_OFFLINE_LIMITS
+        self.limits = {name: Money.from_decimal(value) for name, value in limits.items()}
+        # Autocommit mode; transactions are opened explicitly below
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        # An authorized withdrawal dispenses cash, so it must survive a power cut
+        self.connection.execute('PRAGMA synchronous=FULL')
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def authorize(self, card_number, amount, performed_at=None):
+        """Journal a withdrawal if it is within the offline limits; returns the entry id"""
+        amount = Money.from_decimal(amount)
+        performed_at = performed_at or datetime.now(dt_timezone.utc)
+        # The server's rules (accounts.offline.parse_entries), checked before any cash is dispensed
+        if not isinstance(card_number, str) or not card_number.isdigit() or len(card_number) > 16:
+            raise OfflineEntryError('Card number must be at most 16 digits.')
+        if performed_at.tzinfo is None or performed_at.utcoffset() is None:
+            raise OfflineEntryError('performed_at must be timezone-aware.')
+        business_date = performed_at.date().isoformat()
+        if amount.paise <= 0:
+            raise OfflineLimitError('Amount must be positive.')
+        if amount > self.limits['per_withdrawal']:
+            raise OfflineLimitError(f'Offline withdrawals are limited to ₹{self.limits["per_withdrawal"]}.')
+
+        entry_id = uuid.uuid4().hex
+        with self._transaction():
+            card_total, = self.connection.execute(
+                'SELECT COALESCE(SUM(amount_paise), 0) FROM journal WHERE card_number = ? AND business_date = ?',
+                (card_number, business_date),
+            ).fetchone()
+            if card_total + amount.paise > self.limits['per_card_daily'].paise:
+                raise OfflineLimitError(f'Offline daily limit of ₹{self.limits["per_card_daily"]} reached for this card.')
+            unsynced, = self.connection.execute(
+                "SELECT COALESCE(SUM(amount_paise), 0) FROM journal WHERE status = 'PENDING'"
+            ).fetchone()
+            if unsynced + amount.paise > self.limits['terminal_float'].paise:
+                raise OfflineLimitError('Terminal offline float exhausted; sync before dispensing more.')
+            self.connection.execute(
+                'INSERT INTO journal (entry_id, card_number, amount_paise, performed_at, business_date) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (entry_id, card_number, amount.paise, performed_at.isoformat(), business_date),
+            )
+        return entry_id
+
+    def pending(self, limit):
+        """Oldest unsynced entries in wire format"""
+        rows = self.connection.execute(
+            "SELECT entry_id, card_number, amount_paise, performed_at FROM journal "
+            "WHERE status = 'PENDING' ORDER BY rowid LIMIT ?", (limit,)
+        )
+        return [
+            {'entry_id': entry_id, 'card_number': card_number, 'amount': amount, 'performed_at': performed_at}
+            for entry_id, card_number, amount, performed_at in rows
+        ]
+
+    def sync(self, send, batch_size=500):
+        """Post pending entries in batches until none are left; returns {status: count}
+
+        `send` takes a list of entries and returns the server's results. A
+        failure leaves the current batch pending, to be resent next time.
+        """
+        counts = {'APPLIED': 0, 'CONFLICT': 0}
+        while True:
+            batch = self.pending(batch_size)
+            if not batch:
+                return counts
+            results = send(batch)
+            with self._transaction():
+                self.connection.executemany(
+                    'UPDATE journal SET status = ?, reason = ?, transaction_id = ? '
+                    "WHERE entry_id = ? AND status = 'PENDING'",
+                    [(result['status'], result.get('reason', ''), result.get('transaction_id') or '',
+                      result['entry_id']) for result in results],
+                )
+            for result in results:
+                counts[result['status']] = counts.get(result['status'], 0) + 1
+            if len(results) < len(batch):
+                # The server skipped entries (should not happen); avoid resending forever
+                raise RuntimeError(f'Server returned {len(results)} results for {len(batch)} entries')
+
+    def summary(self):
+        """Entry count and total per status"""
+        return {
+            status: (count, Money(total))
+            for status, count, total in self.connection.execute(
+                'SELECT status, COUNT(*), SUM(amount_paise) FROM journal GROUP BY status'
+            )
+        }
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction taken up front, so limit checks and inserts are serialised"""
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+        self.connection.execute('COMMIT')
+
+
+def http_sender(url, terminal_id, token, timeout=30):
+    """Sender for OfflineJournal.sync() that posts batches to the central server"""
+    def send(entries):
+        request = urllib.request.Request(
+            url,
+            data=json.dumps({'terminal_id': terminal_id, 'entries': entries}).encode('utf-8'),
+            headers={'Content-Type': 'application/json', 'Authorization': f'Terminal {token}'},
+            method='POST',
+        )
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())['results']
+    return send
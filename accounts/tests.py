@@ -0,0 +1,628 @@
+import copy
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock, skipIf
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.shortcuts import get_object_or_404
+from django.template import Context, Template
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+
+from . import analytics, audit, eod
+from .cards import CARD_REJECTED
+from .models import Account, BatchCheckpoint, Card, PendingCredit, TerminalEntry, Transaction, User
+from .money import Money
+from .routers import PIN_SESSION_KEY
+from .terminal import OfflineEntryError, OfflineJournal
+from .transfers import TransferError, apply_pending_credits, post_transfer
+
+
+def _client_for(user, account):
+    """Logged-in client with the account active and its PIN verified"""
+    client = Client()
+    client.force_login(user)
+    session = client.session
+    session['active_account_id'] = account.id
+    session['pin_verified'] = True
+    session.save()
+    return client
+
+
+# A second SQLite file standing in for a read replica. Replicas normally come
+# from DB_REPLICAS; this alias is registered at import so the test runner
+# creates it as a file-backed test database.
+REPLICA_ALIAS = 'test_replica'
+if REPLICA_ALIAS not in connections.settings:
+    connections.settings[REPLICA_ALIAS] = copy.deepcopy(connections.settings['default'])
+    connections.settings[REPLICA_ALIAS]['TEST']['NAME'] = os.path.join(
+        tempfile.gettempdir(), f'atm-test-replica-{os.getpid()}.sqlite3'
+    )
+
+
+@override_settings(REPLICA_DATABASES=[REPLICA_ALIAS])
+class ReplicaRoutingTests(TransactionTestCase):
+    """Reads routed to a second SQLite file, pinned to the primary after a write"""
+    databases = {'default', REPLICA_ALIAS}
+
+    def replicate(self):
+        """Copy the primary into the replica file, as replication would"""
+        connections[REPLICA_ALIAS].close()
+        connections['default'].ensure_connection()
+        replica = sqlite3.connect(connections[REPLICA_ALIAS].settings_dict['NAME'])
+        try:
+            connections['default'].connection.backup(replica)
+        finally:
+            replica.close()
+
+    def setUp(self):
+        self.user = User.objects.create_user('reader', password='pw12345678', is_staff=True, is_superuser=True)
+        self.account = Account.objects.create(user=self.user, pin='1234', balance=Decimal('100.00'))
+        self.replicate()
+        self.client = _client_for(self.user, self.account)
+
+    def history(self):
+        with CaptureQueriesContext(connections[REPLICA_ALIAS]) as replica_queries:
+            response = self.client.get('/transaction-history/')
+        self.assertEqual(response.status_code, 200)
+        return response, len(replica_queries)
+
+    def test_reads_pinned_to_primary_after_write_then_replica(self):
+        _response, replica_reads = self.history()
+        self.assertGreater(replica_reads, 0)
+
+        self.client.post('/deposit/', {'amount': '25.00', 'description': 'pinned'})
+        deposit = Transaction.objects.get(account=self.account)
+        response, replica_reads = self.history()
+        self.assertEqual(replica_reads, 0)
+        self.assertContains(response, deposit.transaction_id)
+
+        session = self.client.session
+        session[PIN_SESSION_KEY] = 0
+        session.save()
+        response, replica_reads = self.history()
+        self.assertGreater(replica_reads, 0)
+        # The replica has not caught up with the deposit yet
+        self.assertNotContains(response, deposit.transaction_id)
+
+    def test_admin_changelist_reads_replica_only_for_get(self):
+        with CaptureQueriesContext(connections[REPLICA_ALIAS]) as replica_queries:
+            self.assertEqual(self.client.get('/admin/accounts/account/').status_code, 200)
+        self.assertGreater(len(replica_queries), 0)
+
+        with CaptureQueriesContext(connections[REPLICA_ALIAS]) as replica_queries:
+            response = self.client.post('/admin/accounts/account/', {
+                'action': 'delete_selected', '_selected_action': [self.account.id],
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(replica_queries), 0)
+
+
+@override_settings(CARD_MAX_PIN_ATTEMPTS=3)
+class CardLoginTests(TestCase):
+    """Card + PIN login gives nothing away and blocks a card after repeated wrong PINs"""
+
+    def setUp(self):
+        user = User.objects.create_user('cardholder', password='pw12345678')
+        self.account = Account.objects.create(user=user, pin='1234', balance=Decimal('100.00'))
+        self.card = Card.objects.create(account=self.account, expiry_date=date.today() + timedelta(days=365))
+
+    def login(self, pin, card_number=None):
+        return self.client.post('/card-login/', {'card_number': card_number or self.card.card_number, 'pin': pin})
+
+    def test_unknown_card_and_wrong_pin_get_the_same_message(self):
+        self.assertContains(self.login('0000', card_number='0' * 16), CARD_REJECTED)
+        self.assertContains(self.login('0000'), CARD_REJECTED)
+
+    def test_wrong_pins_block_the_card(self):
+        for _ in range(3):
+            self.assertContains(self.login('0000'), CARD_REJECTED)
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.status, 'BLOCKED')
+        # The cached resolution was dropped, so the right PIN no longer works
+        self.assertContains(self.login('1234'), CARD_REJECTED)
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+    def test_card_blocked_or_expired_elsewhere_is_refused(self):
+        # Updates that send no signal, as from another worker's or a batch job's process
+        self.assertRedirects(self.login('1234'), '/dashboard/', fetch_redirect_response=False)
+        self.client.logout()
+        Card.objects.filter(id=self.card.id).update(status='BLOCKED')
+        self.assertContains(self.login('1234'), CARD_REJECTED)
+
+        Card.objects.filter(id=self.card.id).update(status='ACTIVE', expiry_date=date.today() - timedelta(days=1))
+        self.assertContains(self.login('1234'), CARD_REJECTED)
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+    def test_correct_pin_resets_the_count(self):
+        self.login('0000')
+        self.login('0000')
+        self.assertRedirects(self.login('1234'), '/dashboard/', fetch_redirect_response=False)
+        self.card.refresh_from_db()
+        self.assertEqual((self.card.status, self.card.failed_pin_attempts), ('ACTIVE', 0))
+
+
+class FragmentCacheTests(TestCase):
+    """Cached page fragments are keyed on the rows' updated_at, so edits from any process show up"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('holder', password='pw12345678', email='old@example.com')
+        self.account = Account.objects.create(user=self.user, pin='1234', balance=Decimal('100.00'))
+        self.client = _client_for(self.user, self.account)
+
+    def test_receipt_shows_status_edited_after_caching(self):
+        transaction = Transaction.objects.create(
+            account=self.account, transaction_type='DEPOSIT', amount=Decimal('10.00'),
+            balance_before=Decimal('100.00'), balance_after=Decimal('110.00'), status='PENDING',
+        )
+        self.assertContains(self.client.get(f'/transaction/{transaction.pk}/'), 'badge-status-pending')
+        transaction.status = 'FAILED'
+        transaction.save()
+        self.assertContains(self.client.get(f'/transaction/{transaction.pk}/'), 'badge-status-failed')
+
+    def test_profile_shows_edit_made_outside_the_profile_page(self):
+        self.assertContains(self.client.get('/profile/'), 'old@example.com')
+        self.user.email = 'new@example.com'
+        self.user.save()
+        self.assertContains(self.client.get('/profile/'), 'new@example.com')
+
+
+class MoneyTests(SimpleTestCase):
+    """Arithmetic results are real, immutable Money values; templates format them with |rupees"""
+
+    def test_arithmetic_results(self):
+        total = Money(1050) + Money(250) - Money(100)
+        self.assertEqual(total, Money(1200))
+        self.assertEqual(-(total * 2), Money(-2400))
+        self.assertIsInstance(total, Money)
+        with self.assertRaises(AttributeError):
+            total.paise = 0
+
+    def test_rupees_filter(self):
+        template = Template('{% load money %}{{ money|rupees }} {{ decimal|rupees }} [{{ junk|rupees }}]')
+        rendered = template.render(Context({'money': Money(123450), 'decimal': Decimal('7.5'), 'junk': 'abc'}))
+        self.assertEqual(rendered, '₹1234.50 ₹7.50 []')
+
+
+class PendingCreditDisplayTests(TestCase):
+    """Queued credits are shown through the rupees filter"""
+
+    def test_balance_inquiry_shows_pending_credits(self):
+        user = User.objects.create_user('merchant', password='pw12345678')
+        account = Account.objects.create(user=user, pin='1234', balance=Decimal('100.00'), queue_credits=True)
+        PendingCredit.objects.create(account=account, amount=Money(1250), description='queued')
+        response = _client_for(user, account).get('/balance/')
+        self.assertContains(response, '₹12.50')
+
+
+class QueuedCreditRaceTests(TestCase):
+    """Balance writers re-read the account, so credits the worker applies mid-request are kept"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('merchant', password='pw12345678')
+        self.account = Account.objects.create(user=self.user, pin='1234', balance=Decimal('100.00'), queue_credits=True)
+        PendingCredit.objects.create(account=self.account, amount=Money(5000), description='queued')
+        self.client = _client_for(self.user, self.account)
+
+    def post_while_worker_runs(self, path, data):
+        def load_then_apply_credits(*args, **kwargs):
+            loaded = get_object_or_404(*args, **kwargs)
+            apply_pending_credits()
+            return loaded
+
+        with mock.patch('accounts.views.get_object_or_404', load_then_apply_credits):
+            return self.client.post(path, data)
+
+    def assertBalance(self, expected):
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal(expected))
+        latest = Transaction.objects.filter(account=self.account).order_by('-id').first()
+        self.assertEqual(latest.balance_after, Decimal(expected))
+
+    def test_deposit_keeps_applied_credit(self):
+        self.post_while_worker_runs('/deposit/', {'amount': '10.00'})
+        self.assertBalance('160.00')
+
+    def test_withdrawal_keeps_applied_credit(self):
+        # More than the balance the page loaded, less than the balance with the credit
+        self.post_while_worker_runs('/withdraw/', {'amount': '130.00'})
+        self.assertBalance('20.00')
+
+    def test_transaction_ids_do_not_collide_within_a_second(self):
+        ids = {Transaction().generate_transaction_id() for _ in range(50000)}
+        self.assertEqual(len(ids), 50000)
+        self.assertTrue(all(len(transaction_id) == 20 and transaction_id.startswith('TXN') for transaction_id in ids))
+
+    def test_transfer_from_stale_sender(self):
+        recipient = Account.objects.create(user=self.user, pin='1234', balance=Decimal('0.00'))
+        stale = Account.objects.get(id=self.account.id)
+        apply_pending_credits()
+        post_transfer(stale, recipient, Decimal('10.00'), 'rent')
+        self.assertBalance('140.00')
+        with self.assertRaises(TransferError):
+            post_transfer(stale, recipient, Decimal('140.01'), 'too much')
+
+
+class AccountOverviewQueryCountTests(TestCase):
+    """The accounts overview costs the same number of queries however many accounts the user has"""
+    # Session and user; accounts with pending totals, their cards, their latest
+    # transactions; session save (savepoint, update, release)
+    overview_queries = 8
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='pw12345678')
+
+    def add_accounts(self, count):
+        accounts = []
+        for _ in range(count):
+            account = Account.objects.create(user=self.user, pin='1234', balance=Decimal('100.00'), queue_credits=True)
+            Card.objects.create(account=account, expiry_date=date.today() + timedelta(days=365))
+            Card.objects.create(account=account, card_type='CREDIT', expiry_date=date.today() + timedelta(days=365))
+            for amount in ('10.00', '20.00'):
+                Transaction.objects.create(
+                    account=account, transaction_type='DEPOSIT', amount=Decimal(amount),
+                    balance_before=Decimal('100.00'), balance_after=Decimal('100.00') + Decimal(amount),
+                )
+            PendingCredit.objects.create(account=account, amount=Money(500), description='queued')
+            accounts.append(account)
+        return accounts
+
+    def test_query_count_does_not_grow_with_accounts(self):
+        first, = self.add_accounts(1)
+        client = _client_for(self.user, first)
+        with self.assertNumQueries(self.overview_queries):
+            response = client.get('/accounts/')
+        self.assertEqual(len(response.context['accounts']), 1)
+
+        self.add_accounts(9)
+        with self.assertNumQueries(self.overview_queries):
+            response = client.get('/accounts/')
+        self.assertEqual(len(response.context['accounts']), 10)
+        self.assertEqual(response.context['total_balance'], Decimal('1050.00'))
+
+
+class AuditTests(TestCase):
+    """Ledger rows and their audit entries commit together; the batch helpers load only for verification"""
+
+    def test_setup_does_not_load_batch_helpers(self):
+        loaded = subprocess.run(
+            [sys.executable, '-c', 'import django, sys; django.setup(); print("accounts.batch" in sys.modules)'],
+            cwd=settings.BASE_DIR, env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'atm_system.settings'},
+            capture_output=True, text=True, check=True,
+        )
+        self.assertEqual(loaded.stdout.strip(), 'False')
+
+    def test_balance_inquiry_rolls_back_without_its_audit_entry(self):
+        user = User.objects.create_user('auditor', password='pw12345678')
+        account = Account.objects.create(user=user, pin='1234', balance=Decimal('100.00'))
+        client = _client_for(user, account)
+        with mock.patch('accounts.signals.record_transactions', side_effect=RuntimeError('audit down')):
+            with self.assertRaises(RuntimeError):
+                client.get('/balance/')
+        self.assertFalse(Transaction.objects.filter(account=account).exists())
+
+    def deposits(self, account, count):
+        return [
+            Transaction.objects.create(
+                account=account, transaction_type='DEPOSIT', amount=Decimal('1.00'),
+                balance_before=Decimal('100.00'), balance_after=Decimal('101.00'),
+            )
+            for _ in range(count)
+        ]
+
+    def reasons(self):
+        _checked, count, problems = audit.verify_audit()
+        self.assertEqual(count, len(problems))
+        return [reason for _entry_id, _account_id, reason in problems]
+
+    def test_ledger_row_without_audit_entry_is_flagged(self):
+        user = User.objects.create_user('auditor', password='pw12345678')
+        account = Account.objects.create(user=user, pin='1234', balance=Decimal('100.00'))
+        self.deposits(account, 2)
+        self.assertEqual(self.reasons(), [])
+
+        # bulk_create sends no signal and record_transactions() is not called
+        Transaction.objects.bulk_create([Transaction(
+            account=account, transaction_type='DEPOSIT', amount=Decimal('5.00'),
+            balance_before=Decimal('101.00'), balance_after=Decimal('106.00'), transaction_id='TXNUNAUDITED000001',
+        )])
+        self.assertEqual(self.reasons(), ['transaction TXNUNAUDITED000001 has no audit entry'])
+
+    def test_deleting_the_newest_entries_is_flagged(self):
+        user = User.objects.create_user('auditor', password='pw12345678')
+        account, quiet_account = [Account.objects.create(user=user, pin='1234') for _ in range(2)]
+        *_kept, newest = self.deposits(account, 3)
+        *_kept, quiet_newest = self.deposits(quiet_account, 2)
+        self.assertEqual(self.reasons(), [])
+
+        # Tampering below the ORM: drop the newest entries and their ledger rows
+        with connections['default'].cursor() as cursor:
+            for transaction in (newest, quiet_newest):
+                cursor.execute('DELETE FROM accounts_auditentry WHERE transaction_id = %s', [transaction.id])
+                cursor.execute('DELETE FROM accounts_transaction WHERE id = %s', [transaction.id])
+        # The chain goes on from the shortened head, so every new entry links up
+        self.deposits(account, 1)
+
+        self.assertEqual(self.reasons(), [
+            'chain cut short or rewritten at entry #3',
+            'chain cut short or rewritten at entry #2',
+        ])
+
+
+@override_settings(
+    TERMINAL_TOKENS={'T001': 'secret'},
+    TERMINAL_OFFLINE_LIMITS={'per_withdrawal': '150.00', 'per_card_daily': '1000.00', 'terminal_float': '10000.00'},
+)
+class TerminalSyncTests(TestCase):
+    """Offline journal synced against this server through the test client"""
+
+    def setUp(self):
+        user = User.objects.create_user('cardholder', password='pw12345678')
+        self.account = Account.objects.create(user=user, pin='1234', balance=Decimal('100.00'))
+        expiry_date = date.today() + timedelta(days=365)
+        self.card = Card.objects.create(account=self.account, expiry_date=expiry_date)
+        blocked_account = Account.objects.create(user=user, pin='1234', balance=Decimal('100.00'))
+        self.blocked_card = Card.objects.create(account=blocked_account, expiry_date=expiry_date, status='BLOCKED')
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        # The terminal allows more offline than the server accepts, so over-limit entries reach it
+        self.journal = OfflineJournal(os.path.join(directory.name, 'journal.sqlite3'), {
+            'per_withdrawal': '1000.00', 'per_card_daily': '1000.00', 'terminal_float': '10000.00',
+        })
+        self.addCleanup(self.journal.close)
+        self.batches, self.responses = [], []
+
+    def post(self, payload, token='secret'):
+        return self.client.post('/api/terminal/sync/', json.dumps(payload), content_type='application/json',
+                                HTTP_AUTHORIZATION=f'Terminal {token}')
+
+    def send(self, entries):
+        """Sender for OfflineJournal.sync() standing in for http_sender()"""
+        self.batches.append(entries)
+        response = self.post({'terminal_id': 'T001', 'entries': entries})
+        self.assertEqual(response.status_code, 200)
+        self.responses.append(response.json()['results'])
+        return self.responses[-1]
+
+    def journal_rows(self):
+        return list(self.journal.connection.execute('SELECT amount_paise, status, reason FROM journal ORDER BY rowid'))
+
+    def test_sync_applies_and_reports_conflicts(self):
+        self.journal.authorize(self.card.card_number, Decimal('30.00'))
+        self.journal.authorize(self.card.card_number, Decimal('40.00'))
+        self.journal.authorize(self.card.card_number, Decimal('50.00'))
+        self.journal.authorize(self.card.card_number, Decimal('200.00'))
+        self.journal.authorize(self.blocked_card.card_number, Decimal('10.00'))
+        self.journal.authorize('7000000000000000', Decimal('10.00'))
+
+        self.assertEqual(self.journal.sync(self.send, batch_size=4), {'APPLIED': 2, 'CONFLICT': 4})
+        self.assertEqual(len(self.batches), 2)
+        self.assertEqual(self.journal_rows(), [
+            (3000, 'APPLIED', ''),
+            (4000, 'APPLIED', ''),
+            (5000, 'CONFLICT', 'insufficient funds'),
+            (20000, 'CONFLICT', 'over offline limit'),
+            (1000, 'CONFLICT', 'card blocked'),
+            (1000, 'CONFLICT', 'unknown card'),
+        ])
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('30.00'))
+        self.assertEqual(self.journal.sync(self.send), {'APPLIED': 0, 'CONFLICT': 0})
+
+    def test_replayed_batch_applies_nothing_twice(self):
+        for amount in ('10.00', '20.00', '500.00'):
+            self.journal.authorize(self.card.card_number, Decimal(amount))
+        self.journal.sync(self.send)
+        ledger_rows = Transaction.objects.count()
+
+        # Response lost: the terminal sends the same batch again
+        self.assertEqual(self.send(self.batches[0]), self.responses[0])
+        self.assertEqual(Transaction.objects.count(), ledger_rows)
+        self.assertEqual(TerminalEntry.objects.count(), 3)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('70.00'))
+
+    def test_repeated_entry_id_in_one_batch_posts_once(self):
+        entry_id = self.journal.authorize(self.card.card_number, Decimal('25.00'))
+        entry, = self.journal.pending(10)
+        first, second = self.send([entry, dict(entry)])
+        self.assertEqual(first, second)
+        self.assertEqual((first['entry_id'], first['status']), (entry_id, 'APPLIED'))
+        self.assertEqual(Transaction.objects.filter(account=self.account).count(), 1)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('75.00'))
+
+    def test_bad_token_and_malformed_payload_are_rejected(self):
+        self.journal.authorize(self.card.card_number, Decimal('10.00'))
+        entries = self.journal.pending(10)
+        self.assertEqual(self.post({'terminal_id': 'T001', 'entries': entries}, token='wrong').status_code, 403)
+        self.assertEqual(self.post({'terminal_id': 'T999', 'entries': entries}).status_code, 403)
+
+        self.assertEqual(self.post({'entries': entries}).status_code, 400)
+        self.assertEqual(self.post({'terminal_id': 'T001', 'entries': 'none'}).status_code, 400)
+        no_entry_id = [{key: value for key, value in entries[0].items() if key != 'entry_id'}]
+        self.assertEqual(self.post({'terminal_id': 'T001', 'entries': no_entry_id}).status_code, 400)
+        response = self.client.post('/api/terminal/sync/', 'not json', content_type='application/json',
+                                    HTTP_AUTHORIZATION='Terminal secret')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_invalid_entry_does_not_hold_back_the_journal(self):
+        self.journal.authorize(self.card.card_number, Decimal('10.00'))
+        # Written by terminal software that did not validate entries
+        self.journal.connection.execute(
+            "INSERT INTO journal (entry_id, card_number, amount_paise, performed_at, business_date) "
+            "VALUES ('bad-card', '1234-5678', 1000, '2026-01-01T10:00:00+00:00', '2026-01-01'), "
+            "('naive-time', ?, 1000, '2026-01-01T10:00:00', '2026-01-01')", (self.card.card_number,)
+        )
+        self.journal.authorize(self.card.card_number, Decimal('20.00'))
+
+        self.assertEqual(self.journal.sync(self.send), {'APPLIED': 2, 'CONFLICT': 2})
+        self.assertEqual(self.journal_rows(), [
+            (1000, 'APPLIED', ''),
+            (1000, 'CONFLICT', 'invalid card number'),
+            (1000, 'CONFLICT', 'invalid timestamp'),
+            (2000, 'APPLIED', ''),
+        ])
+        self.assertEqual(self.journal.pending(10), [])
+
+    def test_terminal_refuses_entries_the_server_would_reject(self):
+        with self.assertRaises(OfflineEntryError):
+            self.journal.authorize('1234-5678', Decimal('10.00'))
+        with self.assertRaises(OfflineEntryError):
+            self.journal.authorize(self.card.card_number, Decimal('10.00'), performed_at=datetime(2026, 1, 1, 10))
+        self.assertEqual(self.journal.pending(10), [])
+
+    @override_settings(
+        TERMINAL_TOKENS={'T001': 'secret', 'T002': 'secret'},
+        TERMINAL_OFFLINE_LIMITS={'per_withdrawal': '150.00', 'per_card_daily': '50.00', 'terminal_float': '10000.00'},
+    )
+    def test_daily_limit_spans_terminals(self):
+        self.journal.authorize(self.card.card_number, Decimal('30.00'))
+        self.journal.sync(self.send)
+
+        entry = {'entry_id': 'other-terminal', 'card_number': self.card.card_number, 'amount': 3000,
+                 'performed_at': timezone.now().isoformat()}
+        result, = self.post({'terminal_id': 'T002', 'entries': [entry]}).json()['results']
+        self.assertEqual((result['status'], result['reason']), ('CONFLICT', 'over offline daily limit'))
+
+        # The next day starts a new total
+        entry = {**entry, 'entry_id': 'next-day', 'performed_at': (timezone.now() + timedelta(days=1)).isoformat()}
+        result, = self.post({'terminal_id': 'T002', 'entries': [entry]}).json()['results']
+        self.assertEqual(result['status'], 'APPLIED')
+
+
+class MonthlyTotalsTests(TestCase):
+    """Monthly analytics cover whole calendar months"""
+
+    def test_oldest_month_is_not_partial(self):
+        cache.clear()
+        user = User.objects.create_user('analyst', password='pw12345678')
+        account = Account.objects.create(user=user, pin='1234', balance=Decimal('100.00'))
+        for amount in ('10.00', '20.00'):
+            Transaction.objects.create(
+                account=account, transaction_type='DEPOSIT', amount=Decimal(amount),
+                balance_before=Decimal('100.00'), balance_after=Decimal('100.00'), status='SUCCESS',
+            )
+        # One deposit on the last day of the previous month
+        month_start = timezone.localtime().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        Transaction.objects.filter(amount=Decimal('10.00')).update(created_at=month_start - timedelta(hours=1))
+
+        current, = analytics.monthly_totals(account, months=1)
+        self.assertEqual((current['month'], current['deposits']), (month_start.strftime('%Y-%m'), '20.00'))
+        previous, current = analytics.monthly_totals(account, months=2)
+        self.assertEqual(previous['deposits'], '10.00')
+
+
+@override_settings(EOD_ACCOUNT_RULES={
+    'SAVINGS': {'annual_interest_rate': '0.5', 'minimum_balance': '100.00', 'fee_below_minimum': '0.00'},
+    'CHECKING': {'annual_interest_rate': '0.00', 'minimum_balance': '500.00', 'fee_below_minimum': '2.00'},
+    'CURRENT': {'annual_interest_rate': '0.00', 'minimum_balance': '10000.00', 'fee_below_minimum': '5.00'},
+})
+class EndOfDayTests(TestCase):
+    """End-of-day interest and fees are posted once per account per business date"""
+    business_date = date(2026, 3, 31)
+
+    def setUp(self):
+        user = User.objects.create_user('eod', password='pw12345678')
+        self.accounts = [
+            Account.objects.create(
+                user=user, pin='1234', account_type=account_type, balance=Decimal(balance), status=status,
+            )
+            for account_type, balance, status in [
+                ('SAVINGS', '730.00', 'ACTIVE'),     # 730.00 * 0.5 / 365 = 1.00 interest
+                ('CHECKING', '1000.00', 'ACTIVE'),   # above the minimum: nothing
+                ('CHECKING', '300.00', 'ACTIVE'),    # below the minimum: 2.00 fee
+                ('CURRENT', '3.00', 'ACTIVE'),       # fee capped at the balance
+                ('SAVINGS', '730.00', 'INACTIVE'),   # skipped
+            ]
+        ]
+
+    def balances(self):
+        return [str(Account.objects.get(id=account.id).balance) for account in self.accounts]
+
+    def postings(self):
+        return sorted(Transaction.objects.values_list('account_id', 'transaction_type', 'amount'))
+
+    def assertPostedOnce(self):
+        savings, _checking, low_checking, current, _inactive = self.accounts
+        self.assertEqual(self.balances(), ['731.00', '1000.00', '298.00', '0.00', '730.00'])
+        self.assertEqual(self.postings(), [
+            (savings.id, 'INTEREST', Decimal('1.00')),
+            (low_checking.id, 'FEE', Decimal('2.00')),
+            (current.id, 'FEE', Decimal('3.00')),
+        ])
+
+    def test_interest_and_fees_per_account_type(self):
+        self.assertEqual(eod.run_eod(self.business_date, chunk_size=2), (4, 1, 2))
+        self.assertPostedOnce()
+
+    def test_interrupted_run_resumes_without_posting_twice(self):
+        apply_chunk = eod._apply_chunk
+        calls = []
+
+        def fail_on_second_chunk(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError('worker killed')
+            return apply_chunk(*args)
+
+        with mock.patch('accounts.eod._apply_chunk', fail_on_second_chunk):
+            with self.assertRaises(RuntimeError):
+                eod.run_eod(self.business_date, chunk_size=2)
+        checkpoint = BatchCheckpoint.objects.get(job='eod')
+        self.assertEqual((checkpoint.last_processed_id, checkpoint.completed), (self.accounts[1].id, False))
+
+        # Only the chunk after the checkpoint is processed
+        self.assertEqual(eod.run_eod(self.business_date, chunk_size=2), (2, 0, 2))
+        self.assertPostedOnce()
+
+    def test_rerun_for_the_same_date_is_a_no_op(self):
+        eod.run_eod(self.business_date, chunk_size=2)
+        self.assertEqual(eod.run_eod(self.business_date, chunk_size=2), (0, 0, 0))
+        self.assertPostedOnce()
+
+
+class LiveBalanceTests(TestCase):
+    """Balance poll ETags follow the database, so writes from other processes are seen"""
+
+    def setUp(self):
+        user = User.objects.create_user('poller', password='pw12345678')
+        self.account = Account.objects.create(user=user, pin='1234', balance=Decimal('100.00'), queue_credits=True)
+        self.client = _client_for(user, self.account)
+
+    def poll(self, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get('/api/balance/', **headers)
+
+    def test_etag_changes_with_writes_made_elsewhere(self):
+        etag = self.poll()['ETag']
+        self.assertEqual(self.poll(etag).status_code, 304)
+
+        # A bulk job in another process: no signals, no shared cache
+        Account.objects.filter(id=self.account.id).update(balance=Decimal('101.00'), updated_at=timezone.now())
+        response = self.poll(etag)
+        self.assertEqual((response.status_code, response.json()['balance']), (200, '101.00'))
+
+        etag = response['ETag']
+        PendingCredit.objects.create(account=self.account, amount=Money(500), description='queued')
+        response = self.poll(etag)
+        self.assertEqual((response.status_code, response.json()['balance']), (200, '106.00'))
+
+    @skipIf(settings.BALANCE_STREAM, 'the stream is routed when BALANCE_STREAM is on')
+    def test_stream_not_routed_when_disabled(self):
+        with self.assertRaises(NoReverseMatch):
+            reverse('balance_stream')
+        self.assertEqual(self.client.get('/api/balance/stream/').status_code, 404)
@@ -0,0 +1,126 @@
+"""
+Transfer posting and the queued-credit worker.
+
+Transfers to accounts flagged with queue_credits do not lock and rewrite the
+recipient row. The credit is appended to PendingCredit instead, and
+apply_pending_credits() posts queued credits in batches with a single
+balance update per account.
+"""
+from collections import defaultdict
+
+from django.db import transaction as db_transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .audit import record_transactions
+from .models import Account, PendingCredit, Transaction
+from .money import Money
+
+
+class TransferError(ValueError):
+    """A transfer cannot be posted (insufficient balance)"""
+
+
+def post_transfer(account, recipient_account, amount, description):
+    """Debit the sender and credit (or queue a credit to) the recipient
+
+    The rows written are locked and re-read first. The instances passed in
+    may be stale: apply_pending_credits() moves balances with F() updates at
+    any time, and a full save of an old instance would undo them.
+    """
+    with db_transaction.atomic():
+        # Lock in id order so two opposite transfers cannot deadlock; a queued
+        # recipient is not locked, which is the point of queued-credit mode
+        locked_ids = [account.id] if recipient_account.queue_credits else [account.id, recipient_account.id]
+        locked = Account.objects.select_for_update().order_by('id').in_bulk(locked_ids)
+        sender = locked[account.id]
+        if amount > sender.balance:
+            raise TransferError('Insufficient balance.')
+
+        # Debit sender
+        sender_balance_before = sender.balance
+        sender.balance -= amount
+        sender.save(update_fields=['balance', 'updated_at'])
+
+        Transaction.objects.create(
+            account=sender,
+            transaction_type='TRANSFER',
+            amount=amount,
+            balance_before=sender_balance_before,
+            balance_after=sender.balance,
+            description=f'Transfer to {recipient_account.account_number}: {description}',
+            recipient_account=recipient_account,
+            status='SUCCESS'
+        )
+
+        if recipient_account.queue_credits:
+            PendingCredit.objects.create(
+                account=recipient_account,
+                amount=Money.from_decimal(amount),
+                source_account=sender,
+                description=f'Transfer from {sender.account_number}: {description}',
+            )
+            return
+
+        # Credit recipient
+        recipient = locked[recipient_account.id]
+        recipient_balance_before = recipient.balance
+        recipient.balance += amount
+        recipient.save(update_fields=['balance', 'updated_at'])
+
+        Transaction.objects.create(
+            account=recipient,
+            transaction_type='TRANSFER',
+            amount=amount,
+            balance_before=recipient_balance_before,
+            balance_after=recipient.balance,
+            description=f'Transfer from {sender.account_number}: {description}',
+            status='SUCCESS'
+        )
+
+
+def apply_pending_credits(batch_size=5000):
+    """Apply queued credits in batches; returns the number of credits applied"""
+    applied = 0
+    while True:
+        with db_transaction.atomic():
+            credits = list(
+                PendingCredit.objects.select_for_update()
+                .filter(applied=False)
+                .order_by('id')[:batch_size]
+            )
+            if not credits:
+                break
+
+            by_account = defaultdict(list)
+            for credit in credits:
+                by_account[credit.account_id].append(credit)
+            accounts = Account.objects.select_for_update().in_bulk(list(by_account))
+
+            transactions = []
+            now = timezone.now()
+            for account_id, account_credits in by_account.items():
+                balance = accounts[account_id].balance
+                total = Money()
+                for credit in account_credits:
+                    amount = credit.amount.to_decimal()
+                    transactions.append(Transaction(
+                        account_id=account_id,
+                        transaction_type='TRANSFER',
+                        amount=amount,
+                        balance_before=balance,
+                        balance_after=balance + amount,
+                        description=credit.description,
+                        transaction_id=f'PC{credit.id:018d}',
+                    ))
+                    balance += amount
+                    total += credit.amount
+                # One row write per account per batch instead of one per transfer
+                Account.objects.filter(id=account_id).update(
+                    balance=F('balance') + total.to_decimal(), updated_at=now
+                )
+
+            record_transactions(Transaction.objects.bulk_create(transactions))
+            PendingCredit.objects.filter(id__in=[credit.id for credit in credits]).update(applied=True)
+        applied += len(credits)
+    return applied
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
@@ -5,6 +6,7 @@ urlpatterns = [
     path('', views.home, name='home'),
     path('register/', views.register, name='register'),
     path('login/', views.user_login, name='login'),
+    path('card-login/', views.card_login, name='card_login'),
     path('logout/', views.user_logout, name='logout'),
     path('dashboard/', views.dashboard, name='dashboard'),
     path('create-account/', views.create_account, name='create_account'),
@@ -16,7 +18,16 @@ urlpatterns = [
     path('transaction-history/', views.transaction_history, name='transaction_history'),
     path('transaction/<int:transaction_id>/', views.transaction_receipt, name='transaction_receipt'),
     path('balance/', views.balance_inquiry, name='balance_inquiry'),
+    path('accounts/', views.accounts_overview, name='accounts_overview'),
     path('profile/', views.profile, name='profile'),
     path('edit-profile/', views.edit_profile, name='edit_profile'),
     path('change-password/', views.change_password, name='change_password'),
+    path('api/balance/', views.balance_status, name='balance_status'),
+    path('api/terminal/sync/', views.terminal_sync, name='terminal_sync'),
+    path('api/analytics/summary/', views.analytics_summary, name='analytics_summary'),
+    path('api/analytics/volume/', views.analytics_volume, name='analytics_volume'),
 ]
+
+if settings.BALANCE_STREAM:
+    # Holds a connection open for BALANCE_STREAM_SECONDS; only served under ASGI
+    urlpatterns.append(path('api/balance/stream/', views.balance_stream, name='balance_stream'))
@@ -1,13 +1,24 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from django.db import transaction as db_transaction
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_POST
+from django.db.models import OuterRef, Prefetch, Subquery, Sum
+from django.db.models.functions import Coalesce
 from decimal import Decimal
-from .models import User, Account, Transaction, Card
-from .forms import (UserRegistrationForm, AccountCreationForm, PINVerificationForm,
-                    DepositForm, WithdrawalForm, TransferForm)
+import hmac
+import json
+from .models import User, Account, Transaction, Card, PendingCredit
+from .money import MoneyField
+from .routers import read_from_replica
+from .cards import authenticate_card
+from .live import balance_events, balance_version, load_snapshot
 from datetime import datetime, timedelta
 
 
@@ -20,6 +31,7 @@ def home(request):
 
 def register(request):
     """User registration view"""
+    from .forms import UserRegistrationForm
     if request.user.is_authenticated:
         return redirect('dashboard')
     
@@ -58,6 +70,28 @@ def user_login(request):
     return render(request, 'registration/login.html')
 
 
+def card_login(request):
+    """ATM terminal login with card number and PIN"""
+    from .forms import CardLoginForm
+    if request.method == 'POST':
+        form = CardLoginForm(request.POST)
+        if form.is_valid():
+            account, error = authenticate_card(form.cleaned_data['card_number'], form.cleaned_data['pin'])
+            if account is not None:
+                login(request, account.user, backend='django.contrib.auth.backends.ModelBackend')
+                request.session['active_account_id'] = account.id
+                request.session['pin_verified'] = True
+                request.session['pin_verified_at'] = datetime.now().isoformat()
+                messages.success(request, f'Card accepted for account {account.account_number}.')
+                return redirect('dashboard')
+            else:
+                messages.error(request, error)
+    else:
+        form = CardLoginForm()
+    
+    return render(request, 'registration/card_login.html', {'form': form})
+
+
 @login_required
 def user_logout(request):
     """User logout view"""
@@ -69,6 +103,7 @@ def user_logout(request):
 @login_required
 def create_account(request):
     """Create a new bank account"""
+    from .forms import AccountCreationForm
     if request.method == 'POST':
         form = AccountCreationForm(request.POST)
         if form.is_valid():
@@ -77,7 +112,7 @@ def create_account(request):
             account.save()
             
             # Create a card for the account
-            expiry_date = datetime.now() + timedelta(days=365*3)  # 3 years validity
+            expiry_date = datetime.now() + timedelta(days=Card.VALIDITY_DAYS)
             Card.objects.create(
                 account=account,
                 expiry_date=expiry_date.date()
@@ -119,6 +154,8 @@ def dashboard(request):
         'accounts': accounts,
         'active_account': active_account,
         'recent_transactions': recent_transactions,
+        'balance_stream': settings.BALANCE_STREAM,
+        'balance_poll_seconds': settings.BALANCE_POLL_SECONDS,
     }
     
     return render(request, 'accounts/dashboard.html', context)
@@ -136,6 +173,7 @@ def switch_account(request, account_id):
 @login_required
 def verify_pin(request):
     """Verify PIN before transactions"""
+    from .forms import PINVerificationForm
     if request.method == 'POST':
         form = PINVerificationForm(request.POST)
         if form.is_valid():
@@ -177,6 +215,7 @@ def check_pin_verification(request):
 @login_required
 def deposit(request):
     """Deposit money"""
+    from .forms import DepositForm
     if not check_pin_verification(request):
         return redirect(f'/verify-pin/?next={request.path}')
     
@@ -190,9 +229,11 @@ def deposit(request):
             description = form.cleaned_data.get('description', 'Deposit')
             
             with db_transaction.atomic():
+                # Lock and re-read: the queued-credit worker may have moved the balance since it was loaded
+                account = Account.objects.select_for_update().get(id=account.id)
                 balance_before = account.balance
                 account.balance += amount
-                account.save()
+                account.save(update_fields=['balance', 'updated_at'])
                 
                 Transaction.objects.create(
                     account=account,
@@ -215,6 +256,7 @@ def deposit(request):
 @login_required
 def withdraw(request):
     """Withdraw money"""
+    from .forms import WithdrawalForm
     if not check_pin_verification(request):
         return redirect(f'/verify-pin/?next={request.path}')
     
@@ -227,13 +269,14 @@ def withdraw(request):
             amount = form.cleaned_data['amount']
             description = form.cleaned_data.get('description', 'Withdrawal')
             
-            if amount > account.balance:
-                messages.error(request, 'Insufficient balance.')
-            else:
-                with db_transaction.atomic():
+            with db_transaction.atomic():
+                # Lock and re-read: the queued-credit worker may have moved the balance since it was loaded
+                account = Account.objects.select_for_update().get(id=account.id)
+                sufficient = amount <= account.balance
+                if sufficient:
                     balance_before = account.balance
                     account.balance -= amount
-                    account.save()
+                    account.save(update_fields=['balance', 'updated_at'])
                     
                     Transaction.objects.create(
                         account=account,
@@ -244,7 +287,10 @@ def withdraw(request):
                         description=description,
                         status='SUCCESS'
                     )
-                
+            
+            if not sufficient:
+                messages.error(request, 'Insufficient balance.')
+            else:
                 messages.success(request, f'Successfully withdrew ₹{amount}. New balance: ₹{account.balance}')
                 return redirect('dashboard')
     else:
@@ -256,6 +302,8 @@ def withdraw(request):
 @login_required
 def transfer(request):
     """Transfer money to another account"""
+    from .forms import TransferForm
+    from .transfers import TransferError, post_transfer
     if not check_pin_verification(request):
         return redirect(f'/verify-pin/?next={request.path}')
     
@@ -273,43 +321,14 @@ def transfer(request):
             
             if recipient_account.id == account.id:
                 messages.error(request, 'Cannot transfer to the same account.')
-            elif amount > account.balance:
-                messages.error(request, 'Insufficient balance.')
             else:
-                with db_transaction.atomic():
-                    # Debit sender
-                    sender_balance_before = account.balance
-                    account.balance -= amount
-                    account.save()
-                    
-                    Transaction.objects.create(
-                        account=account,
-                        transaction_type='TRANSFER',
-                        amount=amount,
-                        balance_before=sender_balance_before,
-                        balance_after=account.balance,
-                        description=f'Transfer to {recipient_account_number}: {description}',
-                        recipient_account=recipient_account,
-                        status='SUCCESS'
-                    )
-                    
-                    # Credit recipient
-                    recipient_balance_before = recipient_account.balance
-                    recipient_account.balance += amount
-                    recipient_account.save()
-                    
-                    Transaction.objects.create(
-                        account=recipient_account,
-                        transaction_type='TRANSFER',
-                        amount=amount,
-                        balance_before=recipient_balance_before,
-                        balance_after=recipient_account.balance,
-                        description=f'Transfer from {account.account_number}: {description}',
-                        status='SUCCESS'
-                    )
-                
-                messages.success(request, f'Successfully transferred ₹{amount} to {recipient_account_number}')
-                return redirect('dashboard')
+                try:
+                    post_transfer(account, recipient_account, amount, description)
+                except TransferError as error:
+                    messages.error(request, str(error))
+                else:
+                    messages.success(request, f'Successfully transferred ₹{amount} to {recipient_account_number}')
+                    return redirect('dashboard')
     else:
         form = TransferForm()
     
@@ -317,6 +336,7 @@ def transfer(request):
 
 
 @login_required
+@read_from_replica
 def transaction_history(request):
     """View transaction history"""
     account_id = request.session.get('active_account_id')
@@ -343,27 +363,70 @@ def balance_inquiry(request):
     account_id = request.session.get('active_account_id')
     account = get_object_or_404(Account, id=account_id, user=request.user)
     
-    # Create balance inquiry transaction
-    Transaction.objects.create(
-        account=account,
-        transaction_type='BALANCE_INQUIRY',
-        amount=Decimal('0.00'),
-        balance_before=account.balance,
-        balance_after=account.balance,
-        description='Balance Inquiry',
-        status='SUCCESS'
-    )
+    # Create balance inquiry transaction; its audit entry is written in the same block
+    with db_transaction.atomic():
+        Transaction.objects.create(
+            account=account,
+            transaction_type='BALANCE_INQUIRY',
+            amount=Decimal('0.00'),
+            balance_before=account.balance,
+            balance_after=account.balance,
+            description='Balance Inquiry',
+            status='SUCCESS'
+        )
     
     return render(request, 'accounts/balance_inquiry.html', {'account': account})
 
 
 @login_required
+@read_from_replica
 def profile(request):
     """User profile view"""
     accounts = Account.objects.filter(user=request.user)
     return render(request, 'accounts/profile.html', {'accounts': accounts})
 
 
+@login_required
+@read_from_replica
+def accounts_overview(request):
+    """All of the user's accounts with balances, cards and last activity in a fixed number of queries"""
+    latest_transaction = Transaction.objects.filter(account=OuterRef('pk')).order_by('-created_at', '-id')
+    pending_total = (
+        PendingCredit.objects.filter(account=OuterRef('pk'), applied=False)
+        .values('account').annotate(total=Sum('amount')).values('total')
+    )
+    accounts = list(
+        Account.objects.filter(user=request.user)
+        .annotate(
+            latest_transaction_id=Subquery(latest_transaction.values('id')[:1]),
+            pending_total=Coalesce(Subquery(pending_total), 0, output_field=MoneyField()),
+        )
+        .prefetch_related(Prefetch(
+            'cards',
+            queryset=Card.objects.only('account_id', 'card_number', 'card_type', 'status', 'expiry_date'),
+        ))
+        .order_by('account_number')
+    )
+    
+    # One query for every account's latest transaction
+    latest = Transaction.objects.in_bulk([account.latest_transaction_id for account in accounts
+                                          if account.latest_transaction_id])
+    total_balance = Decimal('0.00')
+    for account in accounts:
+        account.latest_transaction = latest.get(account.latest_transaction_id)
+        # Same figure as Account.available_balance, without its per-account query
+        account.overview_balance = account.balance
+        if account.queue_credits:
+            account.overview_balance += account.pending_total.to_decimal()
+        total_balance += account.overview_balance
+    
+    return render(request, 'accounts/accounts_overview.html', {
+        'accounts': accounts,
+        'total_balance': total_balance,
+        'active_account_id': request.session.get('active_account_id'),
+    })
+
+
 @login_required
 def edit_profile(request):
     """Edit user profile"""
@@ -406,5 +469,140 @@ def change_password(request):
 @login_required
 def transaction_receipt(request, transaction_id):
     """View transaction receipt"""
-    transaction = get_object_or_404(Transaction, id=transaction_id, account__user=request.user)
+    transaction = get_object_or_404(
+        Transaction.objects.select_related('account'), id=transaction_id, account__user=request.user
+    )
     return render(request, 'accounts/transaction_receipt.html', {'transaction': transaction})
+
+
+def _int_param(request, name, default, maximum):
+    """Read a positive integer query parameter, falling back to the default"""
+    try:
+        value = int(request.GET.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    return min(max(value, 1), maximum)
+
+
+@login_required
+@read_from_replica
+def analytics_summary(request):
+    """Spending summary for the active account"""
+    account_id = request.session.get('active_account_id')
+    account = get_object_or_404(Account, id=account_id, user=request.user)
+    from . import analytics  # loaded on first use to keep worker startup lean
+    
+    months = _int_param(request, 'months', 12, 36)
+    
+    return JsonResponse({
+        'account_number': account.account_number,
+        'monthly_totals': analytics.monthly_totals(account, months),
+        'top_recipients': analytics.top_recipients(account),
+    })
+
+
+@staff_member_required
+@read_from_replica
+def analytics_volume(request):
+    """System-wide transaction volume by hour"""
+    from . import analytics
+    
+    hours = _int_param(request, 'hours', 24, 24 * 7)
+    return JsonResponse({'hourly_volume': analytics.hourly_volume(hours)})
+
+
+def _balance_etag(request):
+    """ETag for the active account from its balance version, without building the snapshot"""
+    account_id = request.session.get('active_account_id')
+    return balance_version(account_id) if account_id else None
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_balance_etag)
+def balance_status(request):
+    """Balance and latest transaction for the active account; 304 while unchanged"""
+    snapshot = load_snapshot(request.user, request.session.get('active_account_id'))
+    if snapshot is None:
+        raise Http404('No active account')
+    return JsonResponse(snapshot)
+
+
+@login_required
+async def balance_stream(request):
+    """Server-sent events stream of balance changes for the active account (ASGI)"""
+    account_id = await request.session.aget('active_account_id')
+    if not account_id:
+        raise Http404('No active account')
+    events = balance_events(await request.auser(), account_id, request.headers.get('Last-Event-ID'))
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _terminal_id(request, terminal_id):
+    """The terminal id if the request carries that terminal's token"""
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    expected = settings.TERMINAL_TOKENS.get(terminal_id)
+    if scheme != 'Terminal' or not expected or not hmac.compare_digest(token.encode(), expected.encode()):
+        return None
+    return terminal_id
+
+
+@csrf_exempt
+@require_POST
+def terminal_sync(request):
+    """Apply a batch of offline terminal withdrawals; returns one result per entry"""
+    from .offline import TerminalSyncError, apply_terminal_batch
+    try:
+        payload = json.loads(request.body)
+        terminal_id = _terminal_id(request, str(payload['terminal_id']))
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({'error': 'Expected a JSON object with terminal_id and entries'}, status=400)
+    if terminal_id is None:
+        return JsonResponse({'error': 'Unknown terminal or bad token'}, status=403)
+    try:
+        results = apply_terminal_batch(terminal_id, payload.get('entries'))
+    except TerminalSyncError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    return JsonResponse({'results': results})
+
+
+@staff_member_required
+def trace_list(request):
+    """Stored request profiles, newest first"""
+    from .profiling import TraceStore
+    return render(request, 'admin/traces/trace_list.html', {
+        'title': 'Request profiles',
+        'traces': TraceStore().summaries(),
+        'header': settings.PROFILING_HEADER,
+        'sample_rate': settings.PROFILING_SAMPLE_RATE,
+    })
+
+
+@staff_member_required
+def trace_detail(request, trace_id):
+    """Function profile and SQL timeline of one request"""
+    from .profiling import TraceStore
+    store = TraceStore()
+    trace = store.load(trace_id)
+    if trace is None:
+        raise Http404('Trace not found')
+    sort = 'tottime' if request.GET.get('sort') == 'tottime' else 'cumulative'
+    return render(request, 'admin/traces/trace_detail.html', {
+        'title': f'{trace["method"]} {trace["path"]}',
+        'trace': trace,
+        'sort': sort,
+        'function_stats': store.function_stats(trace_id, sort=sort),
+    })
+
+
+@staff_member_required
+def trace_download(request, trace_id, kind):
+    """Download a trace's pstats file or JSON summary"""
+    from .profiling import TraceStore
+    path = TraceStore().path(trace_id, kind)
+    if path is None or not path.exists():
+        raise Http404('Trace not found')
+    return FileResponse(path.open('rb'), as_attachment=True, filename=path.name)
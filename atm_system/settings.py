@@ -13,7 +13,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-atm-system-secret-key-change-in-production'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('DJANGO_DEBUG', '1') == '1'
 
 ALLOWED_HOSTS = ['*']
 
@@ -21,7 +21,9 @@ ALLOWED_HOSTS = ['*']
 # Application definition
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # Admin modules are discovered from the URLconf (see atm_system/urls.py) so
+    # management commands that skip system checks never import them
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -32,10 +34,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
+    'accounts.routers.ReplicaPinningMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -58,6 +63,17 @@ TEMPLATES = [
     },
 ]
 
+# Production template profile: compiled templates are kept in memory by the
+# cached loader (APP_DIRS must be off when loaders are listed explicitly)
+if not DEBUG:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'atm_system.wsgi.application'
 
 
@@ -71,6 +87,102 @@ DATABASES = {
     }
 }
 
+# High-concurrency SQLite profile for branch servers, enabled with SQLITE_TUNED=1.
+# WAL lets readers run alongside the single writer, BEGIN IMMEDIATE takes the write
+# lock up front so ledger transactions wait on busy_timeout instead of failing with
+# "database is locked" on lock upgrade, and connections are kept between requests.
+SQLITE_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA busy_timeout=20000',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA cache_size=-65536',
+]
+
+if os.environ.get('SQLITE_TUNED') == '1':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+            'init_command': ';'.join(SQLITE_PRAGMAS),
+        },
+    })
+
+# Read replicas: comma-separated database paths in DB_REPLICAS, e.g.
+# DB_REPLICAS=/var/lib/atm/replica1.sqlite3,/var/lib/atm/replica2.sqlite3
+REPLICA_DATABASES = []
+for index, replica_name in enumerate(filter(None, os.environ.get('DB_REPLICAS', '').split(',')), start=1):
+    alias = f'replica{index}'
+    DATABASES[alias] = {
+        'ENGINE': DATABASES['default']['ENGINE'],
+        'NAME': replica_name.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['accounts.routers.ReplicaRouter']
+
+# Seconds a user's reads stay on the primary after they write (read-your-writes)
+REPLICA_PIN_SECONDS = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'atm-default',
+    },
+    # Bounded card number -> account resolution cache used by card login
+    'cards': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'atm-cards',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+# Consecutive wrong PINs at card login before the card is blocked
+CARD_MAX_PIN_ATTEMPTS = 3
+
+# Live balance updates. The dashboard polls a JSON endpoint that answers 304
+# while the balance version is unchanged. Set BALANCE_STREAM=1 when serving
+# under ASGI (e.g. uvicorn atm_system.asgi:application) to push updates over
+# server-sent events instead; WSGI workers cannot hold the stream open, so the
+# stream URL is only routed when this is on.
+BALANCE_STREAM = os.environ.get('BALANCE_STREAM') == '1'
+BALANCE_POLL_SECONDS = 15
+BALANCE_STREAM_POLL_SECONDS = 1
+BALANCE_STREAM_SECONDS = 300
+
+# Request profiling (accounts.profiling.ProfilingMiddleware). Staff users can
+# profile a single request by sending "X-Profile: 1"; PROFILING_SAMPLE_RATE
+# (0..1) profiles that fraction of all requests. Traces are listed at
+# /admin/traces/ and only the newest PROFILING_MAX_TRACES are kept.
+PROFILING_HEADER = 'X-Profile'
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_DIR = Path(os.environ.get('PROFILING_DIR', BASE_DIR / 'profiles'))
+PROFILING_MAX_TRACES = 100
+
+# Offline terminal mode (accounts.terminal / accounts.offline). Terminals
+# journal withdrawals locally within these limits (rupees) while the central
+# server is unreachable and post them to /api/terminal/sync/ in batches. The
+# server re-checks per_withdrawal, and per_card_daily across all terminals;
+# terminal_float is enforced by each terminal only.
+# TERMINAL_TOKENS maps terminal ids to shared secrets: "T001:secret,T002:...".
+TERMINAL_OFFLINE_LIMITS = {
+    'per_withdrawal': '10000.00',
+    'per_card_daily': '20000.00',
+    'terminal_float': '500000.00',
+}
+TERMINAL_TOKENS = dict(
+    item.split(':', 1) for item in os.environ.get('TERMINAL_TOKENS', '').split(',') if ':' in item
+)
+TERMINAL_SYNC_MAX_BATCH = 1000
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -111,6 +223,21 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Production static pipeline (DEBUG off): minified, content-hashed files with
+# gzip/brotli variants, served by WhiteNoise. Hashed files get a one-year
+# "immutable" Cache-Control header.
+# Run `python manage.py collectstatic` on deploy.
+if not DEBUG:
+    STORAGES = {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'atm_system.storage.MinifiedManifestStaticFilesStorage'},
+    }
+
+# In development WhiteNoise serves straight from the finders, so STATIC_ROOT need
+# not exist. Set here rather than left to WhiteNoise, which follows settings.DEBUG
+# and so would look for STATIC_ROOT under the test runner.
+WHITENOISE_USE_FINDERS = WHITENOISE_AUTOREFRESH = DEBUG
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
@@ -130,3 +257,11 @@ LOGOUT_REDIRECT_URL = 'login'
 # Session settings
 SESSION_COOKIE_AGE = 1800  # 30 minutes
 SESSION_SAVE_EVERY_REQUEST = True
+
+# End-of-day processing rules per account type: annual interest rate, and the
+# daily fee charged while the balance is below the minimum
+EOD_ACCOUNT_RULES = {
+    'SAVINGS': {'annual_interest_rate': '0.035', 'minimum_balance': '1000.00', 'fee_below_minimum': '0.00'},
+    'CHECKING': {'annual_interest_rate': '0.00', 'minimum_balance': '500.00', 'fee_below_minimum': '2.00'},
+    'CURRENT': {'annual_interest_rate': '0.00', 'minimum_balance': '10000.00', 'fee_below_minimum': '5.00'},
+}
@@ -0,0 +1,60 @@
+"""
+Static files storage for production.
+
+Project CSS and JS under STATICFILES_DIRS are minified, then WhiteNoise's
+manifest storage gives every file a content-hashed name and writes gzip and
+brotli variants next to it.
+"""
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+def minify_css(source):
+    """Strip comments and redundant whitespace from a stylesheet"""
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{};,>])\s*', r'\1', source)
+    source = re.sub(r':\s+', ':', source)
+    return source.replace(';}', '}').strip()
+
+
+def minify_js(source):
+    """Conservative JS minification: drop indentation, blank lines and full-line comments
+
+    Line breaks are kept so automatic semicolon insertion behaves as before.
+    """
+    lines = (line.strip() for line in source.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//')) + '\n'
+
+
+MINIFIERS = {
+    '.css': minify_css,
+    '.js': minify_js,
+}
+
+
+class MinifiedManifestStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """Minify project assets before they are hashed and compressed"""
+
+    def _is_project_file(self, storage):
+        location = Path(getattr(storage, 'location', '')).resolve()
+        return any(location == Path(directory).resolve() for directory in settings.STATICFILES_DIRS)
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            paths = dict(paths)
+            for name, (storage, path) in list(paths.items()):
+                minify = MINIFIERS.get(Path(name).suffix)
+                if minify is None or name.endswith(('.min.css', '.min.js')) or not self._is_project_file(storage):
+                    continue
+                with storage.open(path) as source:
+                    minified = minify(source.read().decode('utf-8'))
+                self.delete(name)
+                self.save(name, ContentFile(minified.encode('utf-8')))
+                # Hash and compress the minified copy instead of the original
+                paths[name] = (self, name)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
@@ -6,7 +6,15 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from accounts import views as accounts_views
+
+admin.autodiscover()
+
 urlpatterns = [
+    # Request profiles; listed before the admin so its catch-all does not match
+    path('admin/traces/', accounts_views.trace_list, name='trace_list'),
+    path('admin/traces/<str:trace_id>/', accounts_views.trace_detail, name='trace_detail'),
+    path('admin/traces/<str:trace_id>.<str:kind>', accounts_views.trace_download, name='trace_download'),
     path('admin/', admin.site.urls),
     path('', include('accounts.urls')),
 ]
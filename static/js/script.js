@@ -124,8 +124,59 @@ document.addEventListener('DOMContentLoaded', function() {
             });
         }
     });
+
+    // Live balance updates on the dashboard
+    const balanceDisplay = document.querySelector('[data-balance-url]');
+    if (balanceDisplay) {
+        watchBalance(balanceDisplay);
+    }
 });
 
+// Keep the balance current: server-sent events when enabled, otherwise
+// conditional polling that costs a 304 while nothing has changed
+function watchBalance(display) {
+    const amount = display.querySelector('.balance-amount');
+    let latestId = null;
+    let etag = null;
+
+    function update(data) {
+        amount.textContent = `₹${data.balance}`;
+        const latest = data.latest_transaction;
+        if (latest && latestId !== null && latest.transaction_id !== latestId) {
+            showMessage(`New ${latest.transaction_type.toLowerCase()}: ₹${latest.amount}`, 'info');
+        }
+        latestId = latest ? latest.transaction_id : '';
+    }
+
+    if (display.dataset.streamUrl && window.EventSource) {
+        const source = new EventSource(display.dataset.streamUrl);
+        source.addEventListener('balance', event => update(JSON.parse(event.data)));
+        return;
+    }
+
+    function poll() {
+        if (document.hidden) {
+            return;
+        }
+        const headers = {'Accept': 'application/json'};
+        if (etag) {
+            headers['If-None-Match'] = etag;
+        }
+        fetch(display.dataset.balanceUrl, {headers: headers, cache: 'no-store', credentials: 'same-origin'})
+            .then(response => {
+                if (response.status !== 200) {
+                    return;
+                }
+                etag = response.headers.get('ETag');
+                return response.json().then(update);
+            })
+            .catch(() => {});
+    }
+
+    poll();
+    setInterval(poll, (Number(display.dataset.pollSeconds) || 15) * 1000);
+}
+
 // Utility function to show messages
 function showMessage(message, type = 'info') {
     const messagesContainer = document.querySelector('.messages-container') || createMessagesContainer();